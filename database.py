@@ -1,9 +1,15 @@
 # database.py
 # Database connection and setup functions
+#
+# The helpers below are synchronous (psycopg2). Call them from coroutines via
+# asyncio.to_thread() so the bot's event loop is never blocked on the database.
 
 import os
+import threading
+from contextlib import contextmanager
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -37,3 +43,179 @@ def setup_database():
     conn.commit()
     conn.close()
     print("[DEBUG] DB: Setup complete.")
+
+# Connections for the helpers below are pooled, so the log task and commands
+# don't pay a fresh TCP + auth handshake on every call. ThreadedConnectionPool
+# is safe to share between the asyncio.to_thread() worker threads.
+POOL_MIN_CONNECTIONS = 2
+POOL_MAX_CONNECTIONS = 10
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when it's exhausted, so
+# callers queue on this semaphore first.
+_pool_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+
+def _get_pool():
+    """Get the shared connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            print("[DEBUG] DB: Creating connection pool.")
+            _pool = psycopg2.pool.ThreadedConnectionPool(POOL_MIN_CONNECTIONS, POOL_MAX_CONNECTIONS, DATABASE_URL)
+        return _pool
+
+def close_db_pool():
+    """Close every pooled connection (call on shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            print("[DEBUG] DB: Closing connection pool.")
+            _pool.closeall()
+            _pool = None
+
+@contextmanager
+def _pooled_connection():
+    """Borrow a pooled connection, raising ConnectionError if the database is unreachable.
+
+    Uncommitted work is rolled back before the connection goes back to the pool.
+    """
+    _pool_slots.acquire()
+    try:
+        try:
+            pool = _get_pool()
+            conn = pool.getconn()
+        except (psycopg2.OperationalError, psycopg2.pool.PoolError) as e:
+            print(f"[ERROR] DB: Could not get pooled connection: {e}")
+            raise ConnectionError("Could not connect to database.") from e
+        try:
+            yield conn
+        finally:
+            # Broken connections (e.g. after a database restart) are discarded
+            if not conn.closed:
+                conn.rollback()
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        _pool_slots.release()
+
+# --- Automatic log posting ---
+def get_log_channels(log_codes):
+    """Get every guild configured for automatic log posts, with its posting state.
+
+    A single query returns (guild_id, channel_id, has_history, unposted_codes) per
+    guild: has_history is False if nothing has ever been posted for the guild, and
+    unposted_codes is the set of the given log codes it hasn't had posted yet.
+    """
+    with _pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT gc.guild_id, gc.channel_id,
+                   EXISTS (SELECT 1 FROM posted_logs WHERE guild_id = gc.guild_id),
+                   ARRAY(
+                       SELECT c.code FROM unnest(%s::text[]) AS c(code)
+                       WHERE NOT EXISTS (
+                           SELECT 1 FROM posted_logs p
+                           WHERE p.guild_id = gc.guild_id AND p.log_code = c.code
+                       )
+                   )
+            FROM guild_channels gc
+        """, (list(log_codes),))
+        return [
+            (guild_id, channel_id, has_history, set(unposted_codes))
+            for guild_id, channel_id, has_history, unposted_codes in cur.fetchall()
+        ]
+
+def mark_logs_posted(guild_ids, log_codes):
+    """Record log codes as posted for guilds without posting them (first run seeding)."""
+    with _pooled_connection() as conn:
+        cur = conn.cursor()
+        psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO posted_logs (guild_id, log_code) VALUES %s ON CONFLICT DO NOTHING",
+            [(guild_id, log_code) for guild_id in guild_ids for log_code in log_codes]
+        )
+        conn.commit()
+
+def record_posted_logs(posted_codes, keep=10):
+    """Record the logs posted during one task tick in a single transaction.
+
+    posted_codes maps guild_id -> list of log codes posted, oldest first. The codes
+    are inserted into posted_logs, each guild's last_log_id (kept for backwards
+    compatibility) is pointed at its newest code, and each guild's history is
+    pruned to the `keep` most recent entries.
+    """
+    if not posted_codes:
+        return
+    with _pooled_connection() as conn:
+        cur = conn.cursor()
+        psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO posted_logs (guild_id, log_code) VALUES %s ON CONFLICT DO NOTHING",
+            [(guild_id, code) for guild_id, codes in posted_codes.items() for code in codes]
+        )
+        psycopg2.extras.execute_values(cur, """
+            UPDATE guild_channels SET last_log_id = v.code
+            FROM (VALUES %s) AS v(gid, code)
+            WHERE guild_channels.guild_id = v.gid
+        """, [(guild_id, codes[-1]) for guild_id, codes in posted_codes.items()])
+        cur.execute("""
+            DELETE FROM posted_logs p
+            WHERE p.guild_id = ANY(%s) AND p.id NOT IN (
+                SELECT q.id FROM posted_logs q
+                WHERE q.guild_id = p.guild_id
+                ORDER BY q.posted_at DESC, q.id DESC
+                LIMIT %s
+            )
+        """, (list(posted_codes), keep))
+        conn.commit()
+
+def set_log_channel(guild_id, channel_id):
+    """Set the channel that receives automatic log posts for a guild."""
+    with _pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO guild_channels (guild_id, channel_id)
+            VALUES (%s, %s)
+            ON CONFLICT (guild_id)
+            DO UPDATE SET channel_id = EXCLUDED.channel_id
+            WHERE guild_channels.channel_id IS DISTINCT FROM EXCLUDED.channel_id
+        """, (guild_id, channel_id))
+        conn.commit()
+
+# --- WoW characters ---
+def get_wow_characters_overview(discord_id, limit=25):
+    """Get when a user's Battle.net data was last updated, plus their top characters.
+
+    Returns (last_updated, characters, total), or None if the account isn't
+    linked. characters are (name, realm, class, level, faction) tuples; only the
+    first `limit` (highest level first) are fetched, total is the full count.
+    """
+    with _pooled_connection() as conn:
+        cur = conn.cursor()
+        # One round-trip. The top characters come from a LIMITed lateral read of
+        # idx_wow_characters_discord_level_nulls_last (already in display order), the total
+        # from a separate count; the LEFT JOIN keeps the connection row even when
+        # the user has no characters (character_name is NULL then).
+        cur.execute("""
+            SELECT c.last_updated, t.total, ch.character_name, ch.realm_name,
+                   ch.character_class, ch.level, ch.faction
+            FROM wow_connections c
+            CROSS JOIN LATERAL (
+                SELECT count(*) AS total FROM wow_characters WHERE discord_id = c.discord_id
+            ) t
+            LEFT JOIN LATERAL (
+                SELECT character_name, realm_name, character_class, level, faction
+                FROM wow_characters
+                WHERE discord_id = c.discord_id
+                ORDER BY level DESC NULLS LAST, character_name ASC
+                LIMIT %s
+            ) ch ON true
+            WHERE c.discord_id = %s
+            ORDER BY ch.level DESC NULLS LAST, ch.character_name ASC
+        """, (limit, discord_id))
+        rows = cur.fetchall()
+        if not rows:
+            return None
+
+        last_updated, total = rows[0][0], rows[0][1]
+        characters = [row[2:7] for row in rows if row[2] is not None]
+        return last_updated, characters, total
@@ -2,14 +2,19 @@
 # Discord UI components, views, and formatting functions
 
 import asyncio
+import heapq
+import logging
 import re
 import time
+from collections import deque
+from itertools import islice
+from operator import itemgetter
 import discord
-import aiohttp
-from wcl_api import get_wcl_token, get_fight_details, get_deaths_for_fight
-from wcl_web_scraper import get_all_boss_health_for_report, get_boss_health_for_wipe
+from wcl_api import get_cached_wcl_token, get_fight_details, get_deaths_for_fight, get_http_session, ReportContext, dig
 from raid_system import SPEC_EMOJIS
 
+logger = logging.getLogger(__name__)
+
 # --- Helper functions for formatting ---
 async def send_ephemeral_with_auto_delete(interaction, content=None, embed=None, view=None, delete_after=600):
     """
@@ -42,7 +47,7 @@ async def send_ephemeral_with_auto_delete(interaction, content=None, embed=None,
             return await interaction.original_response()
         
     except Exception as e:
-        print(f"[ERROR] Failed to send ephemeral message: {e}")
+        logger.error("UI: Failed to send ephemeral message: %s", e)
         try:
             fallback_kwargs = {'ephemeral': True}
             if content is not None:
@@ -58,9 +63,35 @@ async def send_ephemeral_with_auto_delete(interaction, content=None, embed=None,
                 await interaction.response.send_message(**fallback_kwargs)
                 return await interaction.original_response()
         except Exception as fallback_error:
-            print(f"[ERROR] Fallback ephemeral message also failed: {fallback_error}")
+            logger.exception("UI: Fallback ephemeral message also failed: %s", fallback_error)
             return None
 
+# Discord allows about 5 messages per 5 seconds in a channel. Pace our own sends
+# so a burst (e.g. several new logs at once) waits locally instead of hitting 429s.
+CHANNEL_SEND_LIMIT = 5
+CHANNEL_SEND_PERIOD = 5.0
+_channel_send_slots = {}  # channel id -> times of the most recent sends
+
+def _prune_channel_send_slots(now):
+    """Forget channels whose recorded sends have all left the rate-limit window."""
+    stale = [channel_id for channel_id, slots in _channel_send_slots.items()
+             if slots[-1] + CHANNEL_SEND_PERIOD <= now]
+    for channel_id in stale:
+        del _channel_send_slots[channel_id]
+
+async def wait_for_channel_send_slot(channel_id):
+    """Sleep until sending one more message to the channel stays within its rate limit."""
+    now = time.monotonic()
+    _prune_channel_send_slots(now)
+    slots = _channel_send_slots.setdefault(channel_id, deque(maxlen=CHANNEL_SEND_LIMIT))
+    send_at = now
+    if len(slots) == CHANNEL_SEND_LIMIT:
+        send_at = max(now, slots[0] + CHANNEL_SEND_PERIOD)
+    # Reserve the slot before sleeping so concurrent senders queue up behind it
+    slots.append(send_at)
+    if send_at > now:
+        await asyncio.sleep(send_at - now)
+
 async def send_message_with_auto_delete(channel, content=None, embed=None, view=None, delete_after=None):
     """
     Send a regular message that persists in the channel.
@@ -74,6 +105,9 @@ async def send_message_with_auto_delete(channel, content=None, embed=None, view=
         embed: Discord embed (optional)
         view: Discord view with components (optional)
         delete_after: Deprecated parameter (kept for compatibility, but ignored)
+    
+    Returns the sent message, or None if sending failed. discord.NotFound (the
+    channel no longer exists) is re-raised so callers can stop using the channel.
     """
     try:
         kwargs = {}
@@ -84,49 +118,57 @@ async def send_message_with_auto_delete(channel, content=None, embed=None, view=
         if view is not None:
             kwargs['view'] = view
         
+        await wait_for_channel_send_slot(channel.id)
         message = await channel.send(**kwargs)
-        print(f"[DEBUG] Sent persistent message to channel {channel.name}")
+        logger.debug("UI: Sent persistent message to channel %s", channel.name)
         return message
         
+    except discord.NotFound:
+        raise
     except Exception as e:
-        print(f"[ERROR] Failed to send message: {e}")
+        logger.exception("UI: Failed to send message: %s", e)
         return None
 
 # --- Data parsing and formatting functions ---
+# WCL role group name -> role used for colouring
+_ROLE_MAPPING = {
+    'dps': 'dps',
+    'healers': 'healer',
+    'tanks': 'tank'
+}
+
+_ANSI_RESET = '\033[0m'
+_NAME_COLORS = {
+    'dps': '\033[31m',     # Red
+    'healer': '\033[32m',  # Green
+    'tank': '\033[34m'     # Blue
+}
+
+# Where the ranking list can sit inside a rankings response, in lookup order
+_RANKING_PATHS = (
+    (),
+    ('data',),
+    ('data', 'rankings'),
+    ('data', 'rankings', 'data'),
+    ('rankings',),
+    ('rankings', 'data'),
+)
+
 def _find_ranking_list(ranking_data):
     """Extract ranking list from various nested structures."""
     if not ranking_data:
         return None
-    
-    if isinstance(ranking_data, list):
-        return ranking_data
-    
-    if not isinstance(ranking_data, dict):
-        return None
-    
-    if 'data' in ranking_data:
-        potential_list = ranking_data['data']
-        if isinstance(potential_list, list):
-            return potential_list
-        
-        if isinstance(potential_list, dict) and 'rankings' in potential_list:
-            nested_rankings = potential_list['rankings']
-            if isinstance(nested_rankings, list):
-                return nested_rankings
-            elif isinstance(nested_rankings, dict) and 'data' in nested_rankings:
-                triple_nested = nested_rankings['data']
-                if isinstance(triple_nested, list):
-                    return triple_nested
-    
-    if 'rankings' in ranking_data:
-        potential_rankings = ranking_data['rankings']
-        if isinstance(potential_rankings, list):
-            return potential_rankings
-        elif isinstance(potential_rankings, dict) and 'data' in potential_rankings:
-            data_level = potential_rankings['data']
-            if isinstance(data_level, list):
-                return data_level
-    
+
+    for path in _RANKING_PATHS:
+        value = ranking_data
+        try:
+            for key in path:
+                value = value[key]
+        except (KeyError, TypeError):
+            continue
+        if isinstance(value, list):
+            return value
+
     return None
 
 def _parse_ranking_data(ranking_data, fight_details=None):
@@ -159,13 +201,7 @@ def _process_role_data(role_name, role_data, parses, player_roles):
         return
     
     characters = role_data['characters']
-    
-    role_mapping = {
-        'dps': 'dps',
-        'healers': 'healer', 
-        'tanks': 'tank'
-    }
-    simplified_role = role_mapping.get(role_name, role_name)
+    simplified_role = _ROLE_MAPPING.get(role_name, role_name)
     
     for char in characters:
         if isinstance(char, dict):
@@ -173,34 +209,36 @@ def _process_role_data(role_name, role_data, parses, player_roles):
             parses[name] = char
             player_roles[name] = simplified_role
 
-def _filter_player_entries(sorted_entries, parses, player_roles):
+def _filter_player_entries(entries, parses, player_roles):
     """Filter table entries to only include actual players, not NPCs/pets."""
     has_any_ranking_data = len(parses) > 0 or len(player_roles) > 0
     
     if has_any_ranking_data:
         player_entries = []
-        for entry in sorted_entries:
+        for entry in entries:
             name = entry['name']
             if name in parses or name in player_roles:
                 player_entries.append(entry)
         return player_entries
     else:
-        return _apply_basic_filtering(sorted_entries)
+        return _apply_basic_filtering(entries)
 
-def _apply_basic_filtering(sorted_entries):
+_entry_total = itemgetter('total')
+
+# Entry names containing any of these are treated as pets/NPCs
+_NPC_NAME_RE = re.compile(r'totem|pet|spirit|minion|guardian|elemental|wolf|mirror image', re.IGNORECASE)
+
+def _apply_basic_filtering(entries):
     """Apply basic filtering for encounters without ranking data."""
     filtered_entries = []
-    npc_keywords = ['totem', 'pet', 'spirit', 'minion', 'guardian', 'elemental', 'wolf', 'mirror image']
-    
-    for entry in sorted_entries:
-        name = entry['name']
-        
-        if any(keyword in name.lower() for keyword in npc_keywords):
-            continue
-            
+
+    for entry in entries:
         if entry['total'] < 1000:
             continue
-            
+
+        if _NPC_NAME_RE.search(entry['name']):
+            continue
+
         filtered_entries.append(entry)
     
     return filtered_entries
@@ -209,16 +247,13 @@ def _extract_role_data_from_playerdetails(player_details_data):
     """Extract the role data structure from nested playerDetails response."""
     if not isinstance(player_details_data, dict):
         return {}
-    
-    if 'data' in player_details_data:
-        data_level = player_details_data['data']
-        if isinstance(data_level, dict):
-            if 'playerDetails' in data_level:
-                return data_level['playerDetails'] if isinstance(data_level['playerDetails'], dict) else {}
-            else:
-                return data_level
-    
-    return player_details_data
+
+    data_level = player_details_data.get('data')
+    if not isinstance(data_level, dict):
+        return player_details_data
+
+    role_data = data_level.get('playerDetails', data_level)
+    return role_data if isinstance(role_data, dict) else {}
 
 def _normalize_wcl_spec_key(raw_key):
     """Normalize WCL spec keys like 'DeathKnight-Unholy' to 'Death Knight-Unholy'.
@@ -236,15 +271,9 @@ def _extract_player_roles_from_playerdetails(player_details_data, friendly_playe
     player_specs = {}
     role_data = _extract_role_data_from_playerdetails(player_details_data)
     
-    role_mapping = {
-        'tanks': 'tank',
-        'dps': 'dps', 
-        'healers': 'healer'
-    }
-    
     for api_role_name, players_list in role_data.items():
-        if api_role_name in role_mapping and isinstance(players_list, list):
-            simplified_role = role_mapping[api_role_name]
+        if api_role_name in _ROLE_MAPPING and isinstance(players_list, list):
+            simplified_role = _ROLE_MAPPING[api_role_name]
             
             for player_entry in players_list:
                 if isinstance(player_entry, dict) and 'name' in player_entry:
@@ -265,48 +294,21 @@ def _extract_player_roles_from_playerdetails(player_details_data, friendly_playe
                     
                     if spec_key:
                         if spec_key not in SPEC_EMOJIS:
-                            print(f"[DEBUG] Spec key '{spec_key}' not found in SPEC_EMOJIS (icon={icon}, type={player_entry.get('type')}, specs={player_entry.get('specs')})")
+                            logger.debug("UI: Spec key '%s' not found in SPEC_EMOJIS (icon=%s, type=%s, specs=%s)",
+                                         spec_key, icon, player_entry.get('type'), player_entry.get('specs'))
                         player_specs[player_name] = spec_key
     
     return player_roles, player_specs
 
-def _get_colored_name(name, player_roles):
-    """Apply role-based color to player name."""
-    player_role = player_roles.get(name, 'unknown')
-    
-    color_mapping = {
-        'dps': '\033[31m',     # Red
-        'healer': '\033[32m',  # Green  
-        'tank': '\033[34m'     # Blue
-    }
-    
-    if player_role in color_mapping:
-        return f"{color_mapping[player_role]}{name}\033[0m"
-    else:
-        return name
-
-def _format_name_with_padding(colored_name, target_width=20):
-    """Format a name with proper padding, accounting for ANSI color codes."""
-    if '\033[' in colored_name:
-        return colored_name.ljust(target_width + 10)
-    else:
-        return colored_name.ljust(target_width)
+def _format_colored_name(name, player_roles, width=20):
+    """Pad a player name to width visible columns, colored by role when known.
 
-def _get_colored_percentage(percentage_str, percentage_value):
-    """Apply color coding to percentage values based on WoW item quality colors."""
-    if percentage_value is None:
-        return percentage_str.rjust(3)
-    
-    if percentage_value >= 95:
-        return f"\033[33m{percentage_str.rjust(3)}\033[0m"  # Yellow for legendary (95+)
-    elif percentage_value >= 75:
-        return f"\033[35m{percentage_str.rjust(3)}\033[0m"  # Purple for epic (75+)
-    elif percentage_value >= 50:
-        return f"\033[34m{percentage_str.rjust(3)}\033[0m"  # Blue for rare (50+)
-    elif percentage_value >= 25:
-        return f"\033[32m{percentage_str.rjust(3)}\033[0m"  # Green for uncommon (25+)
-    else:
-        return percentage_str.rjust(3)
+    The padding goes inside the color codes so they never count towards the width.
+    """
+    color = _NAME_COLORS.get(player_roles.get(name)) if player_roles else None
+    if color:
+        return f"{color}{name:<{width}}{_ANSI_RESET}"
+    return f"{name:<{width}}"
 
 def _get_parse_color_hex(percentage_value):
     """Get Discord embed color hex based on parse percentage (WoW quality colors)."""
@@ -341,63 +343,40 @@ def _get_parse_emoji(percentage_value):
         return "⚫"  # Black circle for poor
 
 def _get_player_percentages(player_parses):
-    """Extract parse and ilvl percentages from player parse data."""
-    parse_pct = "N/A"
-    ilvl_pct = "N/A"
-    
+    """Extract parse and ilvl percentages (rounded ints, or None) from player parse data."""
+    parse_value = None
+    ilvl_value = None
+
     if player_parses and isinstance(player_parses, dict):
-        if 'rankPercent' in player_parses and player_parses['rankPercent'] is not None:
-            parse_pct = f"{player_parses['rankPercent']:.0f}"
-        
-        if 'bracketPercent' in player_parses and player_parses['bracketPercent'] is not None:
-            ilvl_pct = f"{player_parses['bracketPercent']:.0f}"
+        rank_percent = player_parses.get('rankPercent')
+        if rank_percent is not None:
+            parse_value = round(rank_percent)
+
+        bracket_percent = player_parses.get('bracketPercent')
+        if bracket_percent is not None:
+            ilvl_value = round(bracket_percent)
         else:
-            # Debug: Log when bracketPercent is missing
-            player_name = player_parses.get('name', 'Unknown')
-            print(f"[DEBUG] Missing bracketPercent for {player_name}: {list(player_parses.keys())}")
-    
-    return parse_pct, ilvl_pct
+            logger.debug("UI: Missing bracketPercent for %s: %s",
+                         player_parses.get('name', 'Unknown'), list(player_parses))
 
-def _format_amounts_and_activity(entry, fight_duration_seconds):
-    """Format DPS/HPS amounts and activity percentage."""
-    amount_per_second = entry['total'] / fight_duration_seconds
-    amount_str = f"{amount_per_second / 1_000_000:.2f}m" if amount_per_second >= 1_000_000 else f"{amount_per_second / 1_000:.1f}k"
-    amount_str = amount_str.ljust(6)
+    return parse_value, ilvl_value
 
-    total_amount = entry['total']
-    if total_amount >= 1_000_000_000:
-        amount_total_str = f"{total_amount / 1_000_000_000:.1f}B"
-    elif total_amount >= 1_000_000:
-        amount_total_str = f"{total_amount / 1_000_000:.1f}M"
-    elif total_amount >= 1_000:
-        amount_total_str = f"{total_amount / 1_000:.1f}K"
-    else:
-        amount_total_str = str(total_amount)
-    amount_total_str = amount_total_str.ljust(8)
+# Suffixes for abbreviated totals, largest first
+_AMOUNT_SUFFIXES = ((1_000_000_000, 'B'), (1_000_000, 'M'), (1_000, 'K'))
 
-    active_time = entry.get('activeTime', entry.get('uptime', 0))
-    if fight_duration_seconds > 0:
-        active_percent = (active_time / 1000) / fight_duration_seconds * 100
-        active_percent_str = f"{active_percent:.0f}%".rjust(6)
-    else:
-        active_percent_str = "N/A".rjust(6)
-    
-    return amount_str, amount_total_str, active_percent_str
+def _format_total_amount(total_amount):
+    """Abbreviate a damage/healing total, e.g. 1234567 -> '1.2M'."""
+    for threshold, suffix in _AMOUNT_SUFFIXES:
+        if total_amount >= threshold:
+            return f"{total_amount / threshold:.1f}{suffix}"
+    return str(total_amount)
 
 def _format_amounts_and_activity_mobile(entry, fight_duration_seconds):
     """Format DPS/HPS amounts and activity percentage for mobile (no padding)."""
     amount_per_second = entry['total'] / fight_duration_seconds
     amount_str = f"{amount_per_second / 1_000_000:.2f}m" if amount_per_second >= 1_000_000 else f"{amount_per_second / 1_000:.1f}k"
 
-    total_amount = entry['total']
-    if total_amount >= 1_000_000_000:
-        amount_total_str = f"{total_amount / 1_000_000_000:.1f}B"
-    elif total_amount >= 1_000_000:
-        amount_total_str = f"{total_amount / 1_000_000:.1f}M"
-    elif total_amount >= 1_000:
-        amount_total_str = f"{total_amount / 1_000:.1f}K"
-    else:
-        amount_total_str = str(total_amount)
+    amount_total_str = _format_total_amount(entry['total'])
 
     active_time = entry.get('activeTime', entry.get('uptime', 0))
     if fight_duration_seconds > 0:
@@ -408,17 +387,6 @@ def _format_amounts_and_activity_mobile(entry, fight_duration_seconds):
     
     return amount_str, amount_total_str, active_percent_str
 
-def _format_overheal(entry):
-    """Calculate and format overheal percentage for healing entries."""
-    overheal = entry.get('overheal', 0)
-    total_amount = entry['total']
-    
-    if total_amount > 0:
-        overheal_percent = (overheal / (total_amount + overheal)) * 100
-        return f"{overheal_percent:.0f}%".rjust(8)
-    else:
-        return "N/A".rjust(8)
-
 def _format_overheal_mobile(entry):
     """Calculate and format overheal percentage for healing entries (mobile version)."""
     overheal = entry.get('overheal', 0)
@@ -432,12 +400,13 @@ def _format_overheal_mobile(entry):
 
 def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_duration_seconds, metric, boss_health_percentage=None, encounter_name=None):
     """Create a mobile-friendly embed with spec emojis and colored parse indicators."""
-    print(f"[DEBUG] Mobile embed - table_data exists: {table_data is not None}")
-    print(f"[DEBUG] Mobile embed - table_data entries: {len(table_data.get('entries', [])) if table_data else 0}")
-    print(f"[DEBUG] Mobile embed - ranking_data exists: {ranking_data is not None}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("UI: Mobile embed - table_data exists: %s, entries: %d, ranking_data exists: %s",
+                     table_data is not None, len(table_data.get('entries', [])) if table_data else 0,
+                     ranking_data is not None)
     
     if not table_data or not table_data.get('entries'):
-        print(f"[ERROR] Mobile embed - No table data or entries found")
+        logger.error("UI: Mobile embed - No table data or entries found")
         embed = discord.Embed(
             title="No Data Found",
             description="No performance data found for this fight.",
@@ -466,16 +435,13 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
     if fight_duration_seconds <= 0: 
         fight_duration_seconds = 1
 
-    sorted_entries = sorted(table_data.get('entries', []), key=lambda x: x['total'], reverse=True)
-    player_entries = _filter_player_entries(sorted_entries, parses, player_roles)
+    player_entries = _filter_player_entries(table_data.get('entries', []), parses, player_roles)
 
-    # Limit players — using description (4096 chars) so we can show more
+    # Limit players — using description (4096 chars) so we can show more.
+    # Only the shown players need ordering, so take the top ones off a heap.
     max_players = 20
-    if len(player_entries) > max_players:
-        total_players = len(player_entries)
-        player_entries = player_entries[:max_players]
-    else:
-        total_players = len(player_entries)
+    total_players = len(player_entries)
+    player_entries = heapq.nlargest(max_players, player_entries, key=_entry_total)
     
     # Set embed color based on top performer's parse quality
     embed_color = 0x0099ff  # Default blue
@@ -483,8 +449,7 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
         top_player_name = player_entries[0]['name']
         top_player_parses = parses.get(top_player_name)
         if top_player_parses:
-            top_parse_pct, _ = _get_player_percentages(top_player_parses)
-            top_parse_value = int(top_parse_pct) if top_parse_pct != "N/A" and top_parse_pct.isdigit() else None
+            top_parse_value, _ = _get_player_percentages(top_player_parses)
             parse_color = _get_parse_color_hex(top_parse_value)
             if parse_color:
                 embed_color = parse_color
@@ -507,9 +472,7 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
             spec_emoji = role_fallback.get(role, '❓')
         
         # Get percentages
-        parse_pct, ilvl_pct = _get_player_percentages(player_parses)
-        parse_value = int(parse_pct) if parse_pct != "N/A" and parse_pct.isdigit() else None
-        ilvl_value = int(ilvl_pct) if ilvl_pct != "N/A" and ilvl_pct.isdigit() else None
+        parse_value, ilvl_value = _get_player_percentages(player_parses)
         
         parse_emoji_indicator = _get_parse_emoji(parse_value)
         ilvl_emoji_indicator = _get_parse_emoji(ilvl_value)
@@ -531,13 +494,13 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
         rank_col = f"`{i+1:>2}`"
         name_col = f"`{display_name:<{max_name_length}}`"
         
-        if parse_pct != "N/A":
-            parse_col = f"{parse_emoji_indicator}`{parse_pct:>3}%`"
+        if parse_value is not None:
+            parse_col = f"{parse_emoji_indicator}`{parse_value:>3}%`"
         else:
             parse_col = f"⚪` -- `"
         
-        if ilvl_pct != "N/A":
-            ilvl_col = f"{ilvl_emoji_indicator}`{ilvl_pct:>3}%`"
+        if ilvl_value is not None:
+            ilvl_col = f"{ilvl_emoji_indicator}`{ilvl_value:>3}%`"
         else:
             ilvl_col = f"⚪` -- `"
         
@@ -554,7 +517,7 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
     
     # Safety: truncate if somehow over Discord's 4096 description limit
     if len(description) > 4090:
-        print(f"[WARNING] Description too long ({len(description)} chars), truncating")
+        logger.warning("UI: Description too long (%d chars), truncating", len(description))
         while len(description) > 4090 and player_lines:
             player_lines.pop()
             description = header + "\n" + "\n".join(player_lines)
@@ -572,85 +535,6 @@ def create_mobile_friendly_embed(table_data, ranking_data, fight_details, fight_
     
     return embed
 
-def format_merged_table(fight_details, metric, fight_duration_seconds, encounter_name=None, boss_health_percentage=None):
-    """Format the main performance table."""
-    table_data = fight_details.get('table', {}).get('data', {})
-    ranking_data = fight_details.get('rankings') 
-    
-    # Create header with encounter name and boss health percentage for wipes
-    if encounter_name:
-        if boss_health_percentage is not None:
-            table_title = f"{metric.upper()} on {encounter_name} Wipe ({boss_health_percentage:.2f}%)"
-        else:
-            table_title = f"{metric.upper()} on {encounter_name}"
-    else:
-        table_title = metric.upper()
-    
-    if metric.upper() == "DPS":
-        header = "Parse% | Name                 | DPS      | Amount   | Active% | iLvl %"
-    else:  # HPS
-        header = "Parse% | Name                 | HPS      | Amount   | Overheal | Active% | iLvl %"
-    
-    lines = [f"```ansi\n{table_title}", "=" * len(table_title), header, "-" * len(header)]
-
-    if not table_data or not table_data.get('entries'):
-        return "```No performance data found for this fight.```"
-
-    parses, player_roles = _parse_ranking_data(ranking_data, fight_details)
-    
-    if not player_roles:
-        player_details_data = fight_details.get('playerDetails')
-        player_roles, _ = _extract_player_roles_from_playerdetails(player_details_data)
-
-    if fight_duration_seconds <= 0: 
-        fight_duration_seconds = 1
-
-    sorted_entries = sorted(table_data.get('entries', []), key=lambda x: x['total'], reverse=True)
-    player_entries = _filter_player_entries(sorted_entries, parses, player_roles)
-
-    max_players = 25
-    if len(player_entries) > max_players:
-        player_entries = player_entries[:max_players]
-
-    for entry in player_entries:
-        name = entry['name']
-        player_parses = parses.get(name)
-
-        colored_name = _get_colored_name(name, player_roles)
-        formatted_name = _format_name_with_padding(colored_name)
-
-        parse_pct, ilvl_pct = _get_player_percentages(player_parses)
-
-        parse_value = int(parse_pct) if parse_pct != "N/A" and parse_pct.isdigit() else None
-        ilvl_value = int(ilvl_pct) if ilvl_pct != "N/A" and ilvl_pct.isdigit() else None
-        
-        parse_pct_display = _get_colored_percentage(parse_pct, parse_value)
-        ilvl_pct_display = _get_colored_percentage(ilvl_pct, ilvl_value)
-
-        amount_str, amount_total_str, active_percent_str = _format_amounts_and_activity(
-            entry, fight_duration_seconds
-        )
-
-        if metric.upper() == "DPS":
-            lines.append(f"{parse_pct_display}%   | {formatted_name} | {amount_str} | {amount_total_str} | {active_percent_str} | {ilvl_pct_display}%")
-        else:  # HPS
-            overheal_str = _format_overheal(entry)
-            lines.append(f"{parse_pct_display}%   | {formatted_name} | {amount_str} | {amount_total_str} | {overheal_str} | {active_percent_str} | {ilvl_pct_display}%")
-
-    # Add note if we limited the number of players shown
-    has_any_ranking_data = len(parses) > 0 or len(player_roles) > 0
-    if has_any_ranking_data:
-        total_player_entries = len([entry for entry in sorted_entries if entry['name'] in parses or entry['name'] in player_roles])
-    else:
-        total_player_entries = len(sorted_entries)
-        
-    if total_player_entries > max_players:
-        lines.append("")
-        lines.append(f"(Showing top {max_players} players - {total_player_entries - max_players} more players not shown)")
-
-    lines.append("```")
-    return "\n".join(lines)
-
 def _process_death_event(event, players, abilities, fight_start_time, player_roles):
     """Process a single death event and return formatted line."""
     if event.get('type') != 'death':
@@ -660,31 +544,51 @@ def _process_death_event(event, players, abilities, fight_start_time, player_rol
     target_name = players.get(target_id, f'Player{target_id}')
     
     relative_timestamp_ms = event['timestamp'] - fight_start_time
-    timestamp_str = time.strftime('%M:%S', time.gmtime(relative_timestamp_ms / 1000))
+    minutes, seconds = divmod(max(int(relative_timestamp_ms // 1000), 0), 60)
+    timestamp_str = f"{minutes:02d}:{seconds:02d}"
     
-    colored_name = _get_colored_name(target_name, player_roles) if player_roles and target_name in player_roles else target_name
-    formatted_name = _format_name_with_padding(colored_name)
+    formatted_name = _format_colored_name(target_name, player_roles)
     
     killing_ability_id = event.get('killingAbilityGameID')
     ability_name = abilities.get(killing_ability_id, f'Ability{killing_ability_id}' if killing_ability_id else 'Unknown')
     
     return f"{timestamp_str.ljust(9)} | {formatted_name} | {ability_name}"
 
-def format_deaths_table(death_data, fight_start_time, player_roles=None, encounter_name=None):
-    """Format the deaths table."""
+_DEATHS_HEADER = "Timestamp | Name                 | Killing Blow"
+_DEATHS_HEADER_RULE = "-" * len(_DEATHS_HEADER)
+_DEATHS_TRUNCATED_NOTE = "\n(Table truncated - too many deaths to display)\n```"
+
+def _truncate_table_lines(lines, header_count, max_chars, truncated_note):
+    """Keep a table's header and as many rows as fit in max_chars once joined, then the note.
+
+    truncated_note must close the code block the table opened.
+    """
+    kept = lines[:header_count]
+    remaining = max_chars - len(truncated_note) - sum(len(line) + 1 for line in kept)
+    for line in lines[header_count:]:
+        remaining -= len(line) + 1
+        if remaining < 0:
+            break
+        kept.append(line)
+    kept.append(truncated_note)
+    return kept
+
+def format_deaths_table(death_data, fight_start_time, player_roles=None, encounter_name=None, max_chars=None):
+    """Format the deaths table.
+
+    With max_chars, rows are dropped from the end (with a note) so the result fits.
+    """
     events = death_data.get('events', [])
     players = death_data.get('players', {})
     abilities = death_data.get('abilities', {})
     
-    table_title = f"Deaths on {encounter_name}" if encounter_name else "Deaths"
-    header = "Timestamp | Name                 | Killing Blow"
-    lines = [f"```ansi\n{table_title}", "=" * len(table_title), header, "-" * len(header)]
-    
     if not events:
+        empty_title = f"Deaths on {encounter_name}" if encounter_name else "Deaths on Unknown Fight"
         if encounter_name and "Kill" in encounter_name:
-            return f"```ansi\nDeaths on {encounter_name}\n{'=' * len(f'Deaths on {encounter_name}')}\n\n🎉 Flawless victory! No player deaths occurred during this fight.\n```"
+            message = "🎉 Flawless victory! No player deaths occurred during this fight."
         else:
-            return f"```ansi\nDeaths on {encounter_name if encounter_name else 'Unknown Fight'}\n{'=' * len(f'Deaths on {encounter_name}' if encounter_name else 'Deaths on Unknown Fight')}\n\nNo player deaths found for this fight.\n```"
+            message = "No player deaths found for this fight."
+        return f"```ansi\n{empty_title}\n{'=' * len(empty_title)}\n\n{message}\n```"
 
     max_deaths = 50
     death_lines = []
@@ -696,33 +600,53 @@ def format_deaths_table(death_data, fight_start_time, player_roles=None, encount
     
     if not death_lines:
         return "```No player deaths found for this fight.```"
+
+    table_title = f"Deaths on {encounter_name}" if encounter_name else "Deaths"
+    lines = [f"```ansi\n{table_title}", "=" * len(table_title), _DEATHS_HEADER, _DEATHS_HEADER_RULE, *death_lines]
     
-    lines.extend(death_lines)
-    
-    total_deaths = len([e for e in events if e.get('type') == 'death'])
+    # Every death in the first max_deaths events produced a line; only the rest need counting
+    total_deaths = len(death_lines) + sum(1 for e in islice(events, max_deaths, None) if e.get('type') == 'death')
     if total_deaths > max_deaths:
         lines.append("")
         lines.append(f"(Showing first {max_deaths} deaths - {total_deaths - max_deaths} more deaths occurred)")
     
     lines.append("```")
+
+    if max_chars is not None and sum(len(line) + 1 for line in lines) - 1 > max_chars:
+        lines = _truncate_table_lines(lines, 4, max_chars, _DEATHS_TRUNCATED_NOTE)
     return "\n".join(lines)
 
 # --- Discord UI Classes ---
+DISCORD_MESSAGE_LIMIT = 2000
+# Discord caps a select menu at 25 options. Longer fight lists are paged, with
+# two of the slots on each page used for previous/next page entries.
+SELECT_OPTION_LIMIT = 25
+FIGHTS_PER_PAGE = SELECT_OPTION_LIMIT - 2
+_PREV_PAGE_VALUE = "page:prev"
+_NEXT_PAGE_VALUE = "page:next"
+
 class FightSelect(discord.ui.Select):
-    def __init__(self, fights, report_code, metric, boss_health_data=None):
+    def __init__(self, fights, report_code, metric, boss_health_data=None, report_ctx=None):
         self.report_code = report_code
         self.metric = metric
         self.fights = {str(f['id']): f for f in fights}
         self.boss_health_data = boss_health_data or {}
+        self.report_ctx = report_ctx or ReportContext(report_code)
+        # Seed the context so the callback doesn't scrape again; an empty result
+        # (failed scrape or kill-only log) is left for ensure_boss_health to retry
+        if boss_health_data and not self.report_ctx.boss_health:
+            self.report_ctx.boss_health = boss_health_data
 
         options = []
         wipe_counters = {}
-        for fight in fights:
+        self.wipe_numbers = {}  # fight id -> which wipe on that boss it was
+        for fight in sorted(fights, key=itemgetter('id')):
             boss_name = fight['name']
             if fight['kill']:
                 label = f"{boss_name} (Kill)"
             else:
                 wipe_counters[boss_name] = wipe_counters.get(boss_name, 0) + 1
+                self.wipe_numbers[fight['id']] = wipe_counters[boss_name]
                 
                 # Check if we have boss health data for this fight
                 fight_id = fight['id']
@@ -735,191 +659,190 @@ class FightSelect(discord.ui.Select):
             if len(label) > 100: 
                 label = label[:97] + "..."
             options.append(discord.SelectOption(label=label, value=str(fight['id'])))
-        
-        super().__init__(placeholder="Choose a fight...", min_values=1, max_values=1, options=options[:25])
+
+        self._all_options = options
+        self._page = 0
+        super().__init__(placeholder="Choose a fight...", min_values=1, max_values=1, options=self._page_options())
+
+    def _page_options(self):
+        """Get the options for the current page, with previous/next entries if the fights don't fit in one."""
+        if len(self._all_options) <= SELECT_OPTION_LIMIT:
+            return self._all_options
+
+        page_count = -(-len(self._all_options) // FIGHTS_PER_PAGE)
+        start = self._page * FIGHTS_PER_PAGE
+        options = self._all_options[start:start + FIGHTS_PER_PAGE]
+        if self._page > 0:
+            options.insert(0, discord.SelectOption(label=f"⬅ Earlier fights (page {self._page} of {page_count})", value=_PREV_PAGE_VALUE))
+        if self._page < page_count - 1:
+            options.append(discord.SelectOption(label=f"Later fights ➡ (page {self._page + 2} of {page_count})", value=_NEXT_PAGE_VALUE))
+        return options
     
     @staticmethod
     async def create_with_boss_health(fights, report_code, metric, session, token):
         """Create a FightSelect with boss health data for wipes."""
-        boss_health_data = await get_all_boss_health_for_report(session, report_code)
-        return FightSelect(fights, report_code, metric, boss_health_data)
+        report_ctx = ReportContext(report_code)
+        # Boss health is only shown for wipes, so kill-only logs skip the scrape
+        if not any(not fight['kill'] for fight in fights):
+            return FightSelect(fights, report_code, metric, {}, report_ctx)
+        boss_health_data = await report_ctx.ensure_boss_health(session)
+        return FightSelect(fights, report_code, metric, boss_health_data, report_ctx)
 
     async def callback(self, interaction: discord.Interaction):
+        if self.values[0] in (_PREV_PAGE_VALUE, _NEXT_PAGE_VALUE):
+            self._page += -1 if self.values[0] == _PREV_PAGE_VALUE else 1
+            self.options = self._page_options()
+            await interaction.response.edit_message(view=self.view)
+            return
+
         fight_id = int(self.values[0])
         selected_fight = self.fights[str(fight_id)]
         
         try:
             await interaction.response.defer(thinking=True, ephemeral=True)
         except discord.NotFound:
-            print("[WARNING] Interaction expired before defer (user waited too long or bot restarted)")
+            logger.warning("UI: Interaction expired before defer (user waited too long or bot restarted)")
             return
 
-        async with aiohttp.ClientSession() as session:
-            token = await get_wcl_token(session)
-            if not token:
-                print("[ERROR] Failed to get WCL token in select callback.")
-                await interaction.edit_original_response(content="Error: Could not get WCL token.", view=None)
-                return
+        session = get_http_session()
+        token = await get_cached_wcl_token(session)
+        if not token:
+            logger.error("UI: Failed to get WCL token in select callback.")
+            await interaction.edit_original_response(content="Error: Could not get WCL token.", view=None)
+            return
 
-            formatted_table = "An unknown error occurred."
-            if self.metric in ["dps", "hps"]:
-                encounter_id = selected_fight.get('encounterID')
-                difficulty = selected_fight.get('difficulty')
+        formatted_table = "An unknown error occurred."
+        if self.metric in ["dps", "hps"]:
+            encounter_id = selected_fight.get('encounterID')
+            difficulty = selected_fight.get('difficulty')
 
-                if not encounter_id or encounter_id == 0:
-                    await interaction.edit_original_response(
-                        content=f"The selected fight, **{selected_fight['name']}**, does not have rankings available (it may be a trash fight). Please select a boss kill or wipe.",
-                        view=None
-                    )
-                    return
+            if not encounter_id or encounter_id == 0:
+                await interaction.edit_original_response(
+                    content=f"The selected fight, **{selected_fight['name']}**, does not have rankings available (it may be a trash fight). Please select a boss kill or wipe.",
+                    view=None
+                )
+                return
 
-                is_kill = selected_fight.get('kill', False)
-                fight_details = await get_fight_details(session, token, self.report_code, fight_id, encounter_id, difficulty, self.metric, is_kill)
+            is_kill = selected_fight.get('kill', False)
+            details_request = get_fight_details(
+                session, token, self.report_code, fight_id, encounter_id, difficulty, self.metric, is_kill,
+                start_time=selected_fight.get('startTime'), end_time=selected_fight.get('endTime')
+            )
+            if is_kill:
+                fight_details = await details_request
+            else:
+                # Wipes also need the report's boss health; fetch both at once
+                fight_details, report_boss_health = await asyncio.gather(
+                    details_request, self.report_ctx.ensure_boss_health(session)
+                )
                 
-                if not fight_details:
-                    print("[ERROR] get_fight_details returned no data.")
-                    await interaction.edit_original_response(content="Could not retrieve data for the selected fight. The API may have returned an error. Please check the bot's console for details.", view=None)
-                    return
+            if not fight_details:
+                logger.error("UI: get_fight_details returned no data.")
+                await interaction.edit_original_response(content="Could not retrieve data for the selected fight. The API may have returned an error. Please check the bot's console for details.", view=None)
+                return
 
-                fight_duration_seconds = (selected_fight['endTime'] - selected_fight['startTime']) / 1000
+            fight_duration_seconds = (selected_fight['endTime'] - selected_fight['startTime']) / 1000
                 
-                # Create encounter name with kill/wipe status
-                encounter_name = selected_fight['name']
-                boss_health_percentage = None
+            # Create encounter name with kill/wipe status
+            encounter_name = selected_fight['name']
+            boss_health_percentage = None
                 
-                if selected_fight['kill']:
-                    encounter_name += " (Kill)"
-                else:
-                    # Count wipes for this encounter name in the fights list
-                    wipe_count = 1
-                    for fight in self.fights.values():
-                        if (fight['name'] == selected_fight['name'] and 
-                            fight['id'] < selected_fight['id'] and 
-                            not fight['kill']):
-                            wipe_count += 1
+            if selected_fight['kill']:
+                encounter_name += " (Kill)"
+            else:
+                wipe_count = self.wipe_numbers[fight_id]
                     
-                    # Get boss health percentage for wipes
-                    boss_health = None
+                # Get boss health percentage for wipes
+                boss_health = None
                     
-                    # First try to get it from scraped data if we have fight_details
-                    if fight_details and 'scraped_parses' in fight_details:
-                        scraped_data = fight_details['scraped_parses']
-                        if 'boss_health_percentage' in scraped_data:
-                            boss_health = scraped_data['boss_health_percentage']
-                            print(f"[DEBUG] Got boss health from scraped data: {boss_health}%")
+                # First try to get it from scraped data if we have fight_details
+                if fight_details and 'scraped_parses' in fight_details:
+                    scraped_data = fight_details['scraped_parses']
+                    if 'boss_health_percentage' in scraped_data:
+                        boss_health = scraped_data['boss_health_percentage']
+                        logger.debug("UI: Got boss health from scraped data: %s%%", boss_health)
                     
-                    # If no scraped health data, try the dedicated boss health function
-                    if boss_health is None:
-                        boss_health = await get_boss_health_for_wipe(session, token, self.report_code, fight_id, boss_health_cache=self.boss_health_data)
+                # If no scraped health data, use the report-wide boss health
+                if boss_health is None:
+                    boss_health = report_boss_health.get(fight_id)
                     
-                    if boss_health is not None:
-                        encounter_name += f" Wipe {wipe_count}"
-                        boss_health_percentage = boss_health
-                    else:
-                        encounter_name += f" Wipe {wipe_count}"
+                if boss_health is not None:
+                    encounter_name += f" Wipe {wipe_count}"
+                    boss_health_percentage = boss_health
+                else:
+                    encounter_name += f" Wipe {wipe_count}"
                 
-            elif self.metric == "deaths":
-                print(f"[UI] Getting death details.")
-                fight_start_time = selected_fight['startTime']
-                death_events = await get_deaths_for_fight(session, token, self.report_code, fight_id)
+        elif self.metric == "deaths":
+            logger.info("UI: Getting death details.")
+            fight_start_time = selected_fight['startTime']
+            deaths_request = get_deaths_for_fight(session, token, self.report_code, fight_id, self.report_ctx)
+            if selected_fight['kill']:
+                death_events = await deaths_request
+            else:
+                # Wipes also need the report's boss health; fetch both at once
+                death_events, report_boss_health = await asyncio.gather(
+                    deaths_request, self.report_ctx.ensure_boss_health(session)
+                )
                 
-                # Create encounter name with kill/wipe status
-                encounter_name = selected_fight['name']
-                if selected_fight['kill']:
-                    encounter_name += " (Kill)"
-                else:
-                    # Count wipes for this encounter name in the fights list
-                    wipe_count = 1
-                    for fight in self.fights.values():
-                        if (fight['name'] == selected_fight['name'] and 
-                            fight['id'] < selected_fight['id'] and 
-                            not fight['kill']):
-                            wipe_count += 1
+            # Create encounter name with kill/wipe status
+            encounter_name = selected_fight['name']
+            if selected_fight['kill']:
+                encounter_name += " (Kill)"
+            else:
+                wipe_count = self.wipe_numbers[fight_id]
                     
-                    # Get boss health percentage for wipes
-                    boss_health = await get_boss_health_for_wipe(session, token, self.report_code, fight_id, boss_health_cache=self.boss_health_data)
+                boss_health = report_boss_health.get(fight_id)
                     
-                    if boss_health is not None:
-                        encounter_name += f" Wipe {wipe_count} ({boss_health:.2f}%)"
-                    else:
-                        encounter_name += f" Wipe {wipe_count}"
+                if boss_health is not None:
+                    encounter_name += f" Wipe {wipe_count} ({boss_health:.2f}%)"
+                else:
+                    encounter_name += f" Wipe {wipe_count}"
                 
-                # Also get player roles for color coding in deaths table
-                encounter_id = selected_fight.get('encounterID')
-                difficulty = selected_fight.get('difficulty')
-                player_roles = {}
+            # Also get player roles for color coding in deaths table (the deaths
+            # bundle already carries playerDetails)
+            encounter_id = selected_fight.get('encounterID')
+            player_roles = {}
                 
-                if encounter_id and encounter_id != 0:
-                    # Get rankings data to extract player roles
-                    is_kill = selected_fight.get('kill', False)
-                    fight_details = await get_fight_details(session, token, self.report_code, fight_id, encounter_id, difficulty, "dps", is_kill)
-                    if fight_details and fight_details.get('rankings'):
-                        # Try to get roles from ranking data first
-                        ranking_data = fight_details.get('rankings')
-                        parses, player_roles = _parse_ranking_data(ranking_data)
+            if encounter_id and encounter_id != 0:
+                player_details_data = death_events.get('playerDetails')
+                fights_data = death_events.get('fights', [])
+                friendly_players = fights_data[0].get('friendlyPlayers', []) if fights_data else None
+                player_roles, _ = _extract_player_roles_from_playerdetails(player_details_data, friendly_players)
                     
-                    # If no ranking data, try to extract roles from playerDetails
-                    if not player_roles and fight_details:
-                        print("[DEBUG] No ranking data for deaths table, trying playerDetails role groups")
-                        player_details_data = fight_details.get('playerDetails')
-                        fights_data = fight_details.get('fights', [])
-                        friendly_players = fights_data[0].get('friendlyPlayers', []) if fights_data else None
-                        player_roles, _ = _extract_player_roles_from_playerdetails(player_details_data, friendly_players)
-                        
-                        if not player_roles:
-                            print("[DEBUG] No spec data available for deaths table - will show names without role colors")
+                if not player_roles:
+                    logger.debug("UI: No spec data available for deaths table - will show names without role colors")
                 
-                formatted_table = format_deaths_table(death_events, fight_start_time, player_roles, encounter_name)
+            formatted_table = format_deaths_table(death_events, fight_start_time, player_roles, encounter_name,
+                                                  max_chars=DISCORD_MESSAGE_LIMIT)
             
-            print("[UI] Data formatted. Checking if mobile-friendly version should be offered.")
+        logger.info("UI: Data formatted. Checking if mobile-friendly version should be offered.")
             
-            # For DPS/HPS data, show embed with spec emojis + ANSI colored stats
-            if self.metric in ["dps", "hps"]:
-                table_data = fight_details.get('table', {}).get('data', {}) if fight_details else {}
-                ranking_data = fight_details.get('rankings') if fight_details else None
+        # For DPS/HPS data, show embed with spec emojis + ANSI colored stats
+        if self.metric in ["dps", "hps"]:
+            table_data = dig(fight_details, 'table', 'data') or {}
+            ranking_data = fight_details.get('rankings') if fight_details else None
                 
-                embed = create_mobile_friendly_embed(
-                    table_data, 
-                    ranking_data,
-                    fight_details,
-                    fight_duration_seconds, 
-                    self.metric, 
-                    boss_health_percentage, 
-                    encounter_name
-                )
-                
-                # Link button to view the fight on WCL
-                wcl_url = f"https://www.warcraftlogs.com/reports/{self.report_code}#fight={fight_id}"
-                link_view = WclLinkView(wcl_url)
-                await send_ephemeral_with_auto_delete(
-                    interaction, 
-                    embed=embed,
-                    view=link_view
-                )
-            else:
-                # For deaths and other data, use traditional format with length checking
-                if len(formatted_table) > 2000:
-                    print(f"[UI] Message too long ({len(formatted_table)} chars), truncating.")
-                    
-                    warning_msg = "\n\n(Table truncated - too many players to display)\n```"
-                    max_content_length = 1950 - len(warning_msg)
-                    
-                    truncated = formatted_table[:max_content_length]
-                    last_newline = truncated.rfind('\n')
-                    if last_newline > 0:
-                        truncated = truncated[:last_newline]
-                    
-                    if not truncated.endswith('\033[0m'):
-                        truncated += '\033[0m'
-                    
-                    formatted_table = truncated + warning_msg
-                    print(f"[UI] Truncated to {len(formatted_table)} characters.")
-                    
-                    if len(formatted_table) > 2000:
-                        print(f"[UI] Still too long after truncation, doing emergency truncation.")
-                        formatted_table = formatted_table[:1990] + "\n```"
+            embed = create_mobile_friendly_embed(
+                table_data, 
+                ranking_data,
+                fight_details,
+                fight_duration_seconds, 
+                self.metric, 
+                boss_health_percentage, 
+                encounter_name
+            )
                 
-                await send_ephemeral_with_auto_delete(interaction, content=formatted_table)
+            # Link button to view the fight on WCL
+            wcl_url = f"https://www.warcraftlogs.com/reports/{self.report_code}#fight={fight_id}"
+            link_view = WclLinkView(wcl_url)
+            await send_ephemeral_with_auto_delete(
+                interaction, 
+                embed=embed,
+                view=link_view
+            )
+        else:
+            # The deaths table is already sized to fit in one message
+            await send_ephemeral_with_auto_delete(interaction, content=formatted_table)
 
 class WclLinkView(discord.ui.View):
     """View with a link button to the fight on Warcraft Logs."""
@@ -935,34 +858,34 @@ class WclLinkView(discord.ui.View):
 class LogButtonsView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
-        print("[UI] Persistent LogButtonsView created.")
+        logger.info("UI: Persistent LogButtonsView created.")
 
     def _get_report_code_from_interaction(self, interaction: discord.Interaction) -> str | None:
         try:
             if not interaction.message or not interaction.message.embeds:
-                print("[ERROR] Interaction message has no embeds.")
+                logger.error("UI: Interaction message has no embeds.")
                 return None
             
             embed_url = interaction.message.embeds[0].url
             if not embed_url or "warcraftlogs.com/reports/" not in embed_url:
-                print(f"[ERROR] Embed URL is invalid or missing: {embed_url}")
+                logger.error("UI: Embed URL is invalid or missing: %s", embed_url)
                 return None
 
             report_code = embed_url.strip().split('/')[-1]
             if not report_code:
-                print("[ERROR] Extracted report code is empty.")
+                logger.error("UI: Extracted report code is empty.")
                 return None
             
-            print(f"[UI] Extracted report code: {report_code}")
+            logger.info("UI: Extracted report code: %s", report_code)
             return report_code
         except (IndexError, AttributeError) as e:
-            print(f"[ERROR] Failed to extract report code from interaction: {e}")
+            logger.error("UI: Failed to extract report code from interaction: %s", e)
             return None
 
     async def show_fight_selection(self, interaction: discord.Interaction, metric: str):
         from wcl_api import get_fights_from_report
         
-        print(f"[UI] show_fight_selection called for metric: {metric}")
+        logger.info("UI: show_fight_selection called for metric: %s", metric)
         
         report_code = self._get_report_code_from_interaction(interaction)
         if not report_code:
@@ -973,36 +896,36 @@ class LogButtonsView(discord.ui.View):
             return
 
         await interaction.response.defer(ephemeral=True, thinking=True)
-        async with aiohttp.ClientSession() as session:
-            token = await get_wcl_token(session)
-            if not token:
-                await send_ephemeral_with_auto_delete(interaction, content="Error: Could not get WCL token.")
-                return
+        session = get_http_session()
+        token = await get_cached_wcl_token(session)
+        if not token:
+            await send_ephemeral_with_auto_delete(interaction, content="Error: Could not get WCL token.")
+            return
             
-            fights = await get_fights_from_report(session, token, report_code)
-            if not fights:
-                await send_ephemeral_with_auto_delete(interaction, content="Sorry, no boss encounters found in this log.")
-                return
+        fights = await get_fights_from_report(session, token, report_code)
+        if not fights:
+            await send_ephemeral_with_auto_delete(interaction, content="Sorry, no boss encounters found in this log.")
+            return
             
-            select_view = discord.ui.View(timeout=180)
+        select_view = discord.ui.View(timeout=180)
             
-            # Create FightSelect with boss health data for wipes
-            fight_select = await FightSelect.create_with_boss_health(fights, report_code, metric, session, token)
-            select_view.add_item(fight_select)
+        # Create FightSelect with boss health data for wipes
+        fight_select = await FightSelect.create_with_boss_health(fights, report_code, metric, session, token)
+        select_view.add_item(fight_select)
             
-            await send_ephemeral_with_auto_delete(interaction, content="Please select a fight:", view=select_view)
+        await send_ephemeral_with_auto_delete(interaction, content="Please select a fight:", view=select_view)
 
     @discord.ui.button(label="DPS", style=discord.ButtonStyle.primary, custom_id="dps_button_persistent_final")
     async def dps_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        print("[UI] DPS button pressed.")
+        logger.info("UI: DPS button pressed.")
         await self.show_fight_selection(interaction, "dps")
 
     @discord.ui.button(label="Heal", style=discord.ButtonStyle.success, custom_id="heal_button_persistent_final")
     async def heal_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        print("[UI] Heal button pressed.")
+        logger.info("UI: Heal button pressed.")
         await self.show_fight_selection(interaction, "hps")
     
     @discord.ui.button(label="Deaths", style=discord.ButtonStyle.secondary, custom_id="deaths_button_persistent_final")
     async def deaths_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        print("[UI] Deaths button pressed.")
+        logger.info("UI: Deaths button pressed.")
         await self.show_fight_selection(interaction, "deaths")
@@ -0,0 +1,8 @@
+-- Migration 012: Index for listing a user's characters by level
+-- /mycharacters shows the 25 highest-level characters. The index matches that
+-- query's ORDER BY (level DESC NULLS LAST, character_name), so Postgres can read
+-- a user's top characters in order and stop at the LIMIT instead of sorting
+-- every row; the total is counted separately from the same index.
+
+CREATE INDEX IF NOT EXISTS idx_wow_characters_discord_level_nulls_last
+    ON wow_characters(discord_id, level DESC NULLS LAST, character_name);
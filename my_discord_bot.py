@@ -9,13 +9,21 @@ from dotenv import load_dotenv
 import asyncio
 import aiohttp
 import time
+import random
 import re
 from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
 # --- Custom Module Imports ---
-from database import get_db_connection, setup_database
-from wcl_api import get_wcl_token, get_latest_log, get_latest_logs, get_fights_from_report
-from discord_ui import LogButtonsView, send_message_with_auto_delete
+from database import (
+    get_db_connection, close_db_pool, setup_database, get_log_channels,
+    mark_logs_posted, record_posted_logs, set_log_channel, get_wow_characters_overview,
+)
+from wcl_api import (
+    get_cached_wcl_token, get_latest_log, get_latest_logs, get_fights_from_report,
+    get_http_session, close_http_session,
+)
+from discord_ui import LogButtonsView, send_message_with_auto_delete, wait_for_channel_send_slot
 
 # --- Import SimCraft integration ---
 from simcraft_integration import (
@@ -32,10 +40,17 @@ from run_migrations import run_migrations
 
 # --- Import raid system ---
 from raid_system import (
-    RaidButtonsView, generate_raid_embed, create_raid_event,
+    get_persistent_raid_view, generate_raid_embed, create_raid_event,
     get_raid_event, add_raid_reservation, remove_raid_reservation,
     get_user_signup, refresh_event_embed, backfill_reservations_for_existing_events,
-    get_pending_reminders, mark_reminder_sent
+    get_pending_reminders, mark_reminder_sent, auto_link_raid_log, cleanup_old_events,
+    build_battlenet_connect_response, parse_date, parse_time, DEFAULT_TIMEZONE,
+    set_raid_event_message_id, delete_raid_event,
+)
+# These share their names with the task loops below, so import them under aliases
+from raid_system import (
+    update_started_events as raid_update_started_events,
+    close_expired_signups as raid_close_expired_signups,
 )
 
 # --- Load All Secrets from Environment ---
@@ -51,6 +66,11 @@ BLIZZARD_REDIRECT_URI = os.getenv('BLIZZARD_REDIRECT_URI')
 # --- Configuration Constants ---
 WCL_GUILD_ID = 771376 # Example Guild ID
 
+FACTION_EMOJIS = {
+    'ALLIANCE': "<:alliance:1422562308600893542>",
+    'HORDE': "<:horde:1422562343015022723>",
+}
+
 
 
 # --- Bot and Command Tree Setup ---
@@ -64,154 +84,245 @@ import mythicplus
 mythicplus.setup(client, tree)
 
 # --- Automatic Log Detection Task ---
+LOG_EMBED_COLOR = 0x00ff00
+
+def _build_log_embed(log):
+    """Build the announcement embed for a WCL log.
+
+    Returns (embed, start_datetime) so callers don't convert the start time twice.
+    """
+    log_code = log['code']
+    log_owner = log['owner']['name'] if log.get('owner') else 'Unknown'
+    
+    # Discord renders <t:...:f> in each viewer's own timezone
+    start_seconds = log['startTime'] // 1000
+    start_datetime = datetime.fromtimestamp(start_seconds, tz=timezone.utc)
+    
+    embed = discord.Embed(
+        title=log['title'],
+        url=f"https://www.warcraftlogs.com/reports/{log_code}",
+        description=f"**Owner:** {log_owner}\n**Date:** <t:{start_seconds}:f>",
+        color=LOG_EMBED_COLOR
+    )
+    embed.set_footer(text="Click the buttons below to view performance data")
+    return embed, start_datetime
+
+
+# startTime (ms) of the newest log every guild has dealt with. WCL is asked only
+# for logs that started after it minus LATE_UPLOAD_OVERLAP_MS. Reports are often
+# uploaded after the raid (or the next day), so they can start before a log that
+# was already posted; a day of overlap still picks those up, and posted_logs
+# filters out the ones already posted.
+# _last_handled_codes are the codes of the last fetch every guild dealt with. A
+# tick whose fetch holds nothing else returns before any database work, so the
+# overlap only costs the WCL request itself.
+# Both start empty after a restart and are reset when a log channel is
+# (re)configured so new guilds get seeded.
+_last_seen_start_time = 0
+_last_handled_codes = frozenset()
+LATE_UPLOAD_OVERLAP_MS = 24 * 60 * 60 * 1000
+
+# Guilds are posted to concurrently, but cap how many run at once so a large
+# number of configured guilds doesn't exhaust the DB pool or burst Discord's global limit.
+LOG_POST_CONCURRENCY = 8
+
+# Resolved log channels, plus channels recently found missing so they aren't
+# looked up (and logged as errors) again on every tick.
+MISSING_CHANNEL_RETRY_SECONDS = 3600
+_log_channel_cache = {}
+_missing_log_channels = {}  # channel id -> monotonic time it may be retried
+
+def _get_log_channel(channel_id):
+    """Get a log channel, using the cache and skipping recently-missing channels."""
+    channel = _log_channel_cache.get(channel_id)
+    if channel is not None:
+        return channel
+    if _missing_log_channels.get(channel_id, 0) > time.monotonic():
+        return None
+    channel = client.get_channel(channel_id)
+    if channel is None:
+        print(f"[ERROR] TASK: Channel {channel_id} not found, skipping it for the next hour.")
+        _missing_log_channels[channel_id] = time.monotonic() + MISSING_CHANNEL_RETRY_SECONDS
+    else:
+        _log_channel_cache[channel_id] = channel
+        _missing_log_channels.pop(channel_id, None)
+    return channel
+
+def _pop_due_missing_log_channels():
+    """Forget missing channels that are due for another lookup; returns whether there were any.
+
+    _get_log_channel marks them missing again if they still don't exist.
+    """
+    now = time.monotonic()
+    due = [channel_id for channel_id, retry_at in _missing_log_channels.items() if retry_at <= now]
+    for channel_id in due:
+        del _missing_log_channels[channel_id]
+    return bool(due)
+
+async def _post_new_logs_to_guild_limited(semaphore, *args):
+    """Run _post_new_logs_to_guild while holding a slot of the concurrency semaphore."""
+    async with semaphore:
+        return await _post_new_logs_to_guild(*args)
+
+async def _post_new_logs_to_guild(guild_id, channel_id, unposted_codes, latest_logs, log_embeds, view, failed_codes):
+    """Post any not-yet-posted logs to one guild's log channel.
+
+    unposted_codes are the codes in latest_logs not yet posted to this guild;
+    log_embeds is shared between guilds so each log's embed (and start time) is only built once;
+    view is the persistent LogButtonsView, which can be attached to any number of messages.
+    Codes that fail to post are added to failed_codes so they get retried next tick.
+    A missing channel doesn't fail them: it is retried hourly (see _get_log_channel)
+    and posted_logs keeps its logs pending until then.
+    Returns the log codes posted (oldest first); they are recorded in one batch by the caller.
+    """
+    # Filter to only logs we haven't posted yet
+    new_logs = [log for log in latest_logs if log['code'] in unposted_codes]
+    
+    if not new_logs:
+        print(f"[TASK] All recent logs already posted to guild {guild_id}.")
+        return []
+        
+    channel = _get_log_channel(channel_id)
+    if not channel:
+        return []
+    
+    posted_codes = []
+    
+    # Post new logs oldest-first so they appear in chronological order
+    for log in reversed(new_logs):
+        log_code = log['code']
+        
+        built = log_embeds.get(log_code)
+        if built is None:
+            built = log_embeds[log_code] = _build_log_embed(log)
+        embed, log_timestamp = built
+        
+        try:
+            message = await send_message_with_auto_delete(channel, embed=embed, view=view)
+            if message is None:
+                print(f"[ERROR] TASK: Failed to post log {log_code} to guild {guild_id}, will retry next tick.")
+                failed_codes.add(log_code)
+                continue
+            print(f"[TASK] Posted log {log_code} to guild {guild_id} channel {channel_id}.")
+            posted_codes.append(log_code)
+            
+            # Auto-link this log to any matching raid event
+            try:
+                log_url = f"https://www.warcraftlogs.com/reports/{log_code}"
+                
+                await auto_link_raid_log(client, guild_id, log_url, log_timestamp)
+                print(f"[TASK] Attempted auto-link for log {log_code} in guild {guild_id}")
+            except Exception as link_error:
+                print(f"[WARNING] TASK: Failed to auto-link log {log_code}: {link_error}")
+            
+        except discord.NotFound as e:
+            # Channel was deleted; stop trying it for a while
+            print(f"[ERROR] TASK: Channel {channel_id} for guild {guild_id} no longer exists: {e}")
+            _log_channel_cache.pop(channel_id, None)
+            _missing_log_channels[channel_id] = time.monotonic() + MISSING_CHANNEL_RETRY_SECONDS
+            break
+        except Exception as e:
+            print(f"[ERROR] TASK: Failed to post log {log_code} to guild {guild_id}: {e}")
+            failed_codes.add(log_code)
+    
+    return posted_codes
+
+
 @tasks.loop(minutes=10)
 async def check_for_new_logs():
     """Check for new logs and post them to configured channels."""
+    global _last_seen_start_time, _last_handled_codes
     print("[TASK] Checking for new logs from WCL.")
     
-    # Import datetime at the top of the function to avoid scope issues
-    from datetime import datetime, timezone
-    
-    conn = get_db_connection()
-    if not conn:
-        print("[ERROR] TASK: Cannot connect to database for log checking.")
-        return
-    
-    import psycopg2.extras
-    
     try:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cur.execute("SELECT * FROM guild_channels")
-        guild_configs = cur.fetchall()
+        session = get_http_session()
+        token = await get_cached_wcl_token(session)
+        if not token:
+            print("[ERROR] TASK: Failed to get WCL token for log checking.")
+            return
         
-        if not guild_configs:
+        # Ask WCL first: when it returns nothing, or only logs every guild has
+        # already dealt with, we exit without touching the database at all.
+        # A missing log channel that is due for another lookup still gets a full tick.
+        since_ms = max(_last_seen_start_time - LATE_UPLOAD_OVERLAP_MS, 0)
+        latest_logs = await get_latest_logs(session, token, limit=5, since_ms=since_ms)
+        if not latest_logs:
+            print("[TASK] No new logs found for guild.")
+            return
+        latest_codes = [log['code'] for log in latest_logs]
+        if _last_handled_codes.issuperset(latest_codes) and not _pop_due_missing_log_channels():
+            print("[TASK] No new logs since the last check.")
+            return
+        
+        # All database work runs in a worker thread so the event loop (and the
+        # Discord gateway heartbeat) is never blocked by psycopg2. One query
+        # returns every guild along with which of these logs it still needs.
+        guild_states = await asyncio.to_thread(get_log_channels, latest_codes)
+        
+        if not guild_states:
             print("[TASK] No guilds configured for automatic logs.")
+            _last_handled_codes = frozenset(latest_codes)
             return
         
-        async with aiohttp.ClientSession() as session:
-            token = await get_wcl_token(session)
-            if not token:
-                print("[ERROR] TASK: Failed to get WCL token for log checking.")
-                return
-                
-            latest_logs = await get_latest_logs(session, token, limit=5)
-            if not latest_logs:
-                print("[TASK] No logs found for guild.")
-                return
-            
-            for guild_config in guild_configs:
-                guild_id = guild_config['guild_id']
-                channel_id = guild_config['channel_id']
-                
-                # Get all log codes already posted for this guild
-                cur.execute(
-                    "SELECT log_code FROM posted_logs WHERE guild_id = %s",
-                    (guild_id,)
-                )
-                posted_codes = {row['log_code'] for row in cur.fetchall()}
-                
-                # First run guard: if no logs have ever been tracked for this guild,
-                # seed all current logs as "already posted" to avoid spamming old logs.
-                if not posted_codes:
-                    print(f"[TASK] First run for guild {guild_id} — seeding current logs as already posted.")
-                    for log in latest_logs:
-                        cur.execute(
-                            "INSERT INTO posted_logs (guild_id, log_code) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                            (guild_id, log['code'])
-                        )
-                    conn.commit()
-                    continue
-                
-                # Filter to only logs we haven't posted yet
-                new_logs = [log for log in latest_logs if log['code'] not in posted_codes]
-                
-                if not new_logs:
-                    print(f"[TASK] All recent logs already posted to guild {guild_id}.")
-                    continue
-                    
-                channel = client.get_channel(channel_id)
-                if not channel:
-                    print(f"[ERROR] TASK: Channel {channel_id} not found for guild {guild_id}.")
-                    continue
-                
-                # Post new logs oldest-first so they appear in chronological order
-                for log in reversed(new_logs):
-                    log_code = log['code']
-                    log_title = log['title']
-                    log_start_time = log['startTime']
-                    log_owner = log['owner']['name'] if log.get('owner') else 'Unknown'
-                    
-                    # Format start time
-                    start_datetime = datetime.fromtimestamp(log_start_time / 1000, tz=timezone.utc)
-                    formatted_time = start_datetime.strftime('%Y-%m-%d %H:%M UTC')
-                    
-                    # Create embed
-                    embed = discord.Embed(
-                        title=log_title,
-                        url=f"https://www.warcraftlogs.com/reports/{log_code}",
-                        description=f"**Owner:** {log_owner}\n**Date:** {formatted_time}",
-                        color=0x00ff00
-                    )
-                    embed.set_footer(text="Click the buttons below to view performance data")
-                    
-                    # Add buttons
-                    view = LogButtonsView()
-                    
-                    try:
-                        await send_message_with_auto_delete(channel, embed=embed, view=view)
-                        print(f"[TASK] Posted log {log_code} to guild {guild_id} channel {channel_id}.")
-                        
-                        # Record this log as posted
-                        cur.execute(
-                            "INSERT INTO posted_logs (guild_id, log_code) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                            (guild_id, log_code)
-                        )
-                        # Also keep last_log_id in sync for backwards compatibility
-                        cur.execute(
-                            "UPDATE guild_channels SET last_log_id = %s WHERE guild_id = %s",
-                            (log_code, guild_id)
-                        )
-                        conn.commit()
-                        
-                        # Auto-link this log to any matching raid event
-                        try:
-                            from raid_system import auto_link_raid_log
-                            
-                            log_url = f"https://www.warcraftlogs.com/reports/{log_code}"
-                            log_timestamp = datetime.fromtimestamp(log_start_time / 1000, tz=timezone.utc)
-                            
-                            await auto_link_raid_log(client, guild_id, log_url, log_timestamp)
-                            print(f"[TASK] Attempted auto-link for log {log_code} in guild {guild_id}")
-                        except Exception as link_error:
-                            print(f"[WARNING] TASK: Failed to auto-link log {log_code}: {link_error}")
-                        
-                    except Exception as e:
-                        print(f"[ERROR] TASK: Failed to post log {log_code} to guild {guild_id}: {e}")
-                
-                # Cleanup: keep only the most recent 10 posted logs per guild
-                cur.execute("""
-                    DELETE FROM posted_logs
-                    WHERE guild_id = %s AND id NOT IN (
-                        SELECT id FROM posted_logs
-                        WHERE guild_id = %s
-                        ORDER BY posted_at DESC
-                        LIMIT 10
-                    )
-                """, (guild_id, guild_id))
-                conn.commit()
-    
+        # First run guard: if no logs have ever been tracked for a guild,
+        # seed all current logs as "already posted" to avoid spamming old logs.
+        new_guild_ids = [guild_id for guild_id, _, has_history, _ in guild_states if not has_history]
+        if new_guild_ids:
+            print(f"[TASK] First run for guild(s) {new_guild_ids} — seeding current logs as already posted.")
+            await asyncio.to_thread(mark_logs_posted, new_guild_ids, latest_codes)
+        guild_configs = [
+            (guild_id, channel_id, unposted_codes)
+            for guild_id, channel_id, has_history, unposted_codes in guild_states if has_history
+        ]
+        
+        # One embed per log and the persistent view, shared by every guild that posts it
+        log_embeds = {}
+        view = client.log_buttons_view
+        failed_codes = set()
+        
+        # Guilds are independent, so post to them concurrently (posts within one
+        # channel stay sequential to keep their order and respect per-channel limits)
+        semaphore = asyncio.Semaphore(LOG_POST_CONCURRENCY)
+        results = await asyncio.gather(
+            *(_post_new_logs_to_guild_limited(semaphore, guild_id, channel_id, unposted_codes,
+                                              latest_logs, log_embeds, view, failed_codes)
+              for guild_id, channel_id, unposted_codes in guild_configs),
+            return_exceptions=True
+        )
+        
+        # Logs posted per guild, recorded (and history pruned) in one transaction
+        posted_codes = {}
+        had_errors = bool(failed_codes)
+        for (guild_id, _, _), result in zip(guild_configs, results):
+            if isinstance(result, Exception):
+                print(f"[ERROR] TASK: Failed to process guild {guild_id}: {result}")
+                had_errors = True
+            elif result:
+                posted_codes[guild_id] = result
+        
+        # Cleanup keeps only the most recent 10 posted logs per guild
+        await asyncio.to_thread(record_posted_logs, posted_codes, 10)
+        
+        # Only move the watermark forward once every guild has handled these logs
+        # (guilds whose channel is missing don't hold it back)
+        if not had_errors:
+            _last_seen_start_time = max(_last_seen_start_time, *(log['startTime'] for log in latest_logs))
+            _last_handled_codes = frozenset(latest_codes)
+
     except Exception as e:
         print(f"[ERROR] TASK: Exception during log checking: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+
+@check_for_new_logs.error
+async def check_for_new_logs_error(error):
+    """Log anything that escapes the log task so a failure isn't silent."""
+    print(f"[ERROR] TASK: Log checking task stopped with an error: {error}")
 
 
 @tasks.loop(hours=24)
 async def cleanup_old_raid_events():
     """Clean up raid events that are more than 24 hours old."""
     print("[TASK] Running raid event cleanup...")
-    from raid_system import cleanup_old_events
     cleanup_old_events()
     print("[TASK] Raid event cleanup completed.")
 
@@ -219,23 +330,19 @@ async def cleanup_old_raid_events():
 @tasks.loop(minutes=1)
 async def update_started_events():
     """Update raid events that have recently started."""
-    from raid_system import update_started_events
-    await update_started_events(client)
+    await raid_update_started_events(client)
 
 
 @tasks.loop(minutes=1)
 async def close_expired_signups():
     """Close signups for events whose signup deadline has passed."""
-    from raid_system import close_expired_signups
-    await close_expired_signups(client)
+    await raid_close_expired_signups(client)
 
 
 @tasks.loop(minutes=2)
 async def check_raid_reminders():
     """Check for pending raid reminders and send DMs to users."""
     try:
-        from datetime import datetime, timezone
-        
         # Get current time in UTC
         current_time = datetime.now(timezone.utc)
         
@@ -263,8 +370,6 @@ async def check_raid_reminders():
                 event_time = reminder['event_time']
                 
                 # Create Discord timestamp for automatic timezone conversion
-                from zoneinfo import ZoneInfo
-                from raid_system import DEFAULT_TIMEZONE
                 tz = ZoneInfo(DEFAULT_TIMEZONE)
                 event_datetime_local = datetime.combine(event_date, event_time)
                 event_datetime = event_datetime_local.replace(tzinfo=tz)
@@ -305,16 +410,19 @@ async def check_raid_reminders():
 @client.event
 async def on_ready():
     """Bot ready event handler."""
-    # Run database migrations first
+    # Run database migrations first. Both are blocking psycopg2 work, so run them
+    # in a worker thread to keep the gateway heartbeat going during startup.
     print("[MIGRATIONS] Running database migrations...")
-    run_migrations()
+    await asyncio.to_thread(run_migrations)
     
-    setup_database()
+    await asyncio.to_thread(setup_database)
     
     # Add persistent view for button interactions
     if not hasattr(client, 'added_view'):
-        client.add_view(LogButtonsView())
-        client.add_view(RaidButtonsView())  # Add raid system buttons
+        # Keep the instances: persistent views can be reused for every new message
+        client.log_buttons_view = LogButtonsView()
+        client.add_view(client.log_buttons_view)
+        client.add_view(get_persistent_raid_view())  # Add raid system buttons
         client.added_view = True
     
     # Sync command tree and start background tasks
@@ -353,6 +461,12 @@ async def on_ready():
             print(f"[RESERVE] Backfill error: {e}")
 
 # --- Emoji Reaction Handlers for Reserve ---
+@client.event
+async def on_guild_channel_delete(channel):
+    """Drop deleted channels from the log channel cache."""
+    _log_channel_cache.pop(channel.id, None)
+
+
 @client.event
 async def on_raw_reaction_add(payload: discord.RawReactionActionEvent):
     """Handle ✅ reactions on raid signup messages to add to Reserve"""
@@ -410,36 +524,30 @@ async def on_raw_reaction_remove(payload: discord.RawReactionActionEvent):
 @tree.command(name="set_log_channel", description="Sets this channel for automatic Warcraft Log posts.")
 async def set_log_channel_command(interaction: discord.Interaction):
     """Set the channel for automatic log posts."""
+    global _last_seen_start_time, _last_handled_codes
     await interaction.response.defer(ephemeral=True)
     
     guild_id = interaction.guild_id
     channel_id = interaction.channel_id
     
-    conn = get_db_connection()
-    if not conn:
-        await interaction.edit_original_response(content="❌ **Database Error:** Could not connect to database.")
-        return
-    
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO guild_channels (guild_id, channel_id) 
-            VALUES (%s, %s) 
-            ON CONFLICT (guild_id) 
-            DO UPDATE SET channel_id = EXCLUDED.channel_id
-        """, (guild_id, channel_id))
-        conn.commit()
+        await asyncio.to_thread(set_log_channel, guild_id, channel_id)
+        
+        # Make the next log check fetch recent logs again so this guild gets seeded
+        _last_seen_start_time = 0
+        _last_handled_codes = frozenset()
+        _missing_log_channels.pop(channel_id, None)
         
         await interaction.edit_original_response(
             content=f"✅ **Success!** This channel will now receive automatic Warcraft Log posts."
         )
         print(f"[CMD] Set log channel for guild {guild_id} to channel {channel_id}")
         
+    except ConnectionError:
+        await interaction.edit_original_response(content="❌ **Database Error:** Could not connect to database.")
     except Exception as e:
         print(f"[ERROR] Failed to set log channel: {e}")
         await interaction.edit_original_response(content=f"❌ **Error:** {e}")
-    finally:
-        conn.close()
 
 @tree.command(name="warcraftrecorder", description="Get the join code to join our Warcraft Recorder guild")
 async def warcraft_recorder_command(interaction: discord.Interaction):
@@ -481,7 +589,6 @@ async def connectwow_command(interaction: discord.Interaction):
     
     discord_id = str(interaction.user.id)
 
-    from raid_system import build_battlenet_connect_response
     embed, view = build_battlenet_connect_response(discord_id)
 
     await interaction.edit_original_response(embed=embed, view=view)
@@ -785,34 +892,17 @@ async def mycharacters_command(interaction: discord.Interaction):
     
     discord_id = str(interaction.user.id)
     
-    conn = get_db_connection()
-    if not conn:
-        await interaction.edit_original_response(content="❌ **Database Error:** Could not connect to database.")
-        return
-    
     try:
-        import psycopg2.extras
-        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        
-        # Check if user has connected their account
-        cur.execute("SELECT * FROM wow_connections WHERE discord_id = %s", (discord_id,))
-        connection = cur.fetchone()
+        # Discord embeds hold at most 25 fields, so only fetch that many
+        overview = await asyncio.to_thread(get_wow_characters_overview, discord_id, 25)
         
-        if not connection:
+        if overview is None:
             await interaction.edit_original_response(
                 content="❌ You haven't connected your Battle.net account yet. Use `/connectwow` to get started!"
             )
             return
         
-        # Fetch characters
-        cur.execute("""
-            SELECT character_name, realm_name, character_class, level, faction
-            FROM wow_characters 
-            WHERE discord_id = %s
-            ORDER BY level DESC, character_name ASC
-        """, (discord_id,))
-        
-        characters = cur.fetchall()
+        last_updated, characters, total = overview
         
         if not characters:
             await interaction.edit_original_response(
@@ -823,31 +913,33 @@ async def mycharacters_command(interaction: discord.Interaction):
         # Build character list
         embed = discord.Embed(
             title=f"🎮 {interaction.user.display_name}'s WoW Characters",
-            description=f"Found {len(characters)} character(s)",
+            description=f"Found {total} character(s)",
             color=0x0099ff
         )
         
-        for char in characters[:25]:  # Discord embed field limit
-            faction_emoji = "<:alliance:1422562308600893542>" if char['faction'] == 'ALLIANCE' else "<:horde:1422562343015022723>"
-            class_name = char['character_class'] or 'Unknown'
+        for character_name, realm_name, character_class, level, faction in characters:
+            faction_emoji = FACTION_EMOJIS.get(faction, FACTION_EMOJIS['HORDE'])
+            class_name = character_class or 'Unknown'
             
             embed.add_field(
-                name=f"{faction_emoji} {char['character_name']} - {char['realm_name']}",
-                value=f"Level {char['level']} {class_name}",
+                name=f"{faction_emoji} {character_name} - {realm_name}",
+                value=f"Level {level} {class_name}",
                 inline=True
             )
         
-        last_updated = connection['last_updated'].strftime('%Y-%m-%d %H:%M UTC')
-        embed.set_footer(text=f"Last updated: {last_updated} • Use /connectwow to refresh")
+        # Timestamp markdown doesn't render in footers; the embed timestamp is
+        # shown next to the footer in each viewer's local time instead.
+        embed.timestamp = last_updated
+        embed.set_footer(text="Last updated • Use /connectwow to refresh")
         
         await interaction.edit_original_response(embed=embed)
-        print(f"[CMD] Displayed {len(characters)} characters for Discord user {discord_id}")
+        print(f"[CMD] Displayed {len(characters)} of {total} characters for Discord user {discord_id}")
         
+    except ConnectionError:
+        await interaction.edit_original_response(content="❌ **Database Error:** Could not connect to database.")
     except Exception as e:
         print(f"[ERROR] Failed to fetch characters: {e}")
         await interaction.edit_original_response(content=f"❌ **Error:** {e}")
-    finally:
-        conn.close()
 
 
 @tree.command(name="unlinkwow", description="Unlink your Battle.net account and delete all WoW data")
@@ -914,11 +1006,6 @@ class CreateRaidModal(discord.ui.Modal, title="Create Raid Event"):
     async def on_submit(self, interaction: discord.Interaction):
         """Handle modal submission"""
         try:
-            # Import parse functions from raid_system
-            from raid_system import parse_date, parse_time, create_raid_event, RaidButtonsView, DEFAULT_TIMEZONE
-            from datetime import datetime
-            from zoneinfo import ZoneInfo
-            
             # Parse date and time
             event_date = parse_date(self.date_input.value)
             event_time = parse_time(self.time_input.value)
@@ -951,21 +1038,14 @@ class CreateRaidModal(discord.ui.Modal, title="Create Raid Event"):
         # Defer the response since we're going to create a message
         await interaction.response.defer(ephemeral=True)
         
-        # Create view with buttons
-        view = RaidButtonsView()
-        
-        # Send a placeholder message first (we need the message ID for the database)
-        placeholder_embed = discord.Embed(
-            title="Creating raid event...",
-            color=discord.Color.blue()
-        )
-        message = await interaction.channel.send(embed=placeholder_embed, view=view)
-        
-        # Store event in database
-        event_id = create_raid_event(
+        # Store event in database first so the real embed can be sent in one call.
+        # message_id is UNIQUE NOT NULL, so use the (unique) negated interaction id
+        # as a placeholder until the message exists.
+        event_id = await asyncio.to_thread(
+            create_raid_event,
             guild_id=interaction.guild.id,
             channel_id=interaction.channel.id,
-            message_id=message.id,
+            message_id=-interaction.id,
             title=title,
             event_date=event_date,
             event_time=event_time,
@@ -973,12 +1053,35 @@ class CreateRaidModal(discord.ui.Modal, title="Create Raid Event"):
             signup_deadline=signup_deadline
         )
         
-        # Now generate the proper embed using generate_raid_embed
-        from raid_system import generate_raid_embed
-        embed, view = generate_raid_embed(event_id)
+        # Build the embed straight from the modal data; no need to re-read the new event
+        embed, view = generate_raid_embed(event_id, new_event={
+            'id': event_id,
+            'title': title,
+            'event_date': event_date,
+            'event_time': event_time,
+            'created_by': interaction.user.id,
+            'signup_deadline': signup_deadline,
+            'signups_closed': False,
+            'log_url': None,
+        })
+        
+        try:
+            await wait_for_channel_send_slot(interaction.channel.id)
+            message = await interaction.channel.send(embed=embed, view=view)
+        except Exception:
+            await asyncio.to_thread(delete_raid_event, event_id)
+            raise
         
-        # Update the message with the proper embed
-        await message.edit(embed=embed, view=view)
+        try:
+            await asyncio.to_thread(set_raid_event_message_id, event_id, message.id)
+        except Exception:
+            # The event would keep its placeholder message_id, so signups on the
+            # message could never find it; remove both instead
+            try:
+                await message.delete()
+            finally:
+                await asyncio.to_thread(delete_raid_event, event_id)
+            raise
         
         await interaction.followup.send(
             f"✅ Raid event **{title}** created successfully!\n📋 Event ID: {event_id}",
@@ -1279,6 +1382,38 @@ async def sim_command(interaction: discord.Interaction):
 
 
 # --- Main Execution Block ---
+MAX_START_ATTEMPTS = 5
+
+async def _main():
+    """Start the bot, retrying the initial connection with exponential backoff and jitter.
+
+    Runs inside a single asyncio.run() so retries reuse the same event loop.
+    """
+    delay = 1.92
+    try:
+        for attempt in range(MAX_START_ATTEMPTS):
+            try:
+                await client.start(BOT_TOKEN)
+                return
+            except (aiohttp.ClientError, discord.GatewayNotFound, OSError) as e:
+                if attempt == MAX_START_ATTEMPTS - 1:
+                    raise
+                wait = delay + random.random()
+                print(f"[ERROR] Failed to connect to Discord ({e}), retrying in {wait:.1f}s "
+                      f"(attempt {attempt + 1}/{MAX_START_ATTEMPTS})")
+                # Release the half-open HTTP session/websocket and reset the
+                # client's state so the next start() begins cleanly.
+                await client.close()
+                client.clear()
+                await asyncio.sleep(wait)
+                delay = min(60.0, delay * 1.618)
+    finally:
+        if not client.is_closed():
+            await client.close()
+        await close_http_session()
+        await asyncio.to_thread(close_db_pool)
+
+
 if __name__ == "__main__":
     if not all([BOT_TOKEN, WCL_CLIENT_ID, WCL_CLIENT_SECRET, DATABASE_URL]):
         print("[FATAL] One or more essential environment variables are missing.")
@@ -1296,11 +1431,18 @@ if __name__ == "__main__":
                 break
             except socket.gaierror:
                 if attempt < max_dns_retries - 1:
-                    print(f"[DEBUG] Waiting for network/DNS... (attempt {attempt + 1}/{max_dns_retries})")
-                    time.sleep(5)
+                    # Exponential backoff with jitter, capped at a minute
+                    delay = min(60.0, 1.92 * (1.618 ** attempt)) + random.random()
+                    print(f"[DEBUG] Waiting for network/DNS... (attempt {attempt + 1}/{max_dns_retries}, retrying in {delay:.1f}s)")
+                    time.sleep(delay)
                 else:
                     print("[FATAL] DNS resolution failed after all attempts. Check container network/DNS config.")
                     exit(1)
         
-        # Start the bot (Docker restart policy handles retries if this fails)
-        client.run(BOT_TOKEN)
+        # Start the bot (Docker restart policy handles it if every attempt fails).
+        # client.run() would set up discord.py's logging for us; start() doesn't.
+        discord.utils.setup_logging()
+        try:
+            asyncio.run(_main())
+        except KeyboardInterrupt:
+            pass
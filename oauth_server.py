@@ -5187,8 +5187,9 @@ def create_app(bot=None):
 
 async def start_oauth_server(bot=None, port=8000):
     """Start the OAuth web server"""
-    # Ensure default admin user exists
-    ensure_default_admin_exists()
+    # Ensure default admin user exists (blocking DB + bcrypt work, kept off the
+    # event loop the bot shares with this server)
+    await asyncio.to_thread(ensure_default_admin_exists)
     
     app = create_app(bot)
     runner = web.AppRunner(app)
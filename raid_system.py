@@ -12,6 +12,7 @@ from datetime import datetime, date, time, timezone
 from zoneinfo import ZoneInfo
 import os
 import logging
+import functools
 
 logger = logging.getLogger(__name__)
 
@@ -273,6 +274,13 @@ def abbreviate_class_name(class_name: str) -> str:
     }
     return abbreviations.get(class_name, class_name)
 
+# (separator, strptime format, description used in error messages)
+_DATE_FORMATS = (
+    ('/', "%d/%m/%Y", "DD/MM/YYYY format (e.g., 25/12/2025)"),
+    ('.', "%d.%m.%Y", "DD.MM.YYYY format (e.g., 25.12.2025)"),
+    ('-', "%Y-%m-%d", "YYYY-MM-DD format (e.g., 2025-12-25)"),
+)
+
 def parse_date(date_str: str) -> date:
     """
     Parse date string in DD/MM/YYYY, DD.MM.YYYY, or YYYY-MM-DD format.
@@ -286,32 +294,16 @@ def parse_date(date_str: str) -> date:
     Raises:
         ValueError: If date format is invalid
     """
-    # Try DD/MM/YYYY format first
-    if '/' in date_str:
-        parts = date_str.split('/')
-        if len(parts) != 3:
-            raise ValueError("Date must be in DD/MM/YYYY format (e.g., 25/12/2025)")
-        day, month, year = map(int, parts)
-        return date(year, month, day)
-    
-    # Try DD.MM.YYYY format
-    elif '.' in date_str:
-        parts = date_str.split('.')
-        if len(parts) != 3:
-            raise ValueError("Date must be in DD.MM.YYYY format (e.g., 25.12.2025)")
-        day, month, year = map(int, parts)
-        return date(year, month, day)
-    
-    # Try YYYY-MM-DD format
-    elif '-' in date_str:
-        parts = date_str.split('-')
-        if len(parts) != 3:
-            raise ValueError("Date must be in YYYY-MM-DD format (e.g., 2025-12-25)")
-        year, month, day = map(int, parts)
-        return date(year, month, day)
+    # The separator picks the format; strptime does the splitting and range checks in C
+    date_str = date_str.strip()
+    for separator, fmt, example in _DATE_FORMATS:
+        if separator in date_str:
+            try:
+                return datetime.strptime(date_str, fmt).date()
+            except ValueError:
+                raise ValueError(f"Date must be in {example}") from None
     
-    else:
-        raise ValueError("Date must be in DD/MM/YYYY, DD.MM.YYYY, or YYYY-MM-DD format")
+    raise ValueError("Date must be in DD/MM/YYYY, DD.MM.YYYY, or YYYY-MM-DD format")
 
 def parse_time(time_str: str) -> time:
     """
@@ -326,15 +318,10 @@ def parse_time(time_str: str) -> time:
     Raises:
         ValueError: If time format is invalid
     """
-    parts = time_str.split(':')
-    if len(parts) != 2:
-        raise ValueError("Time must be in HH:MM format (e.g., 20:00)")
-    
-    hour, minute = map(int, parts)
-    if not (0 <= hour <= 23 and 0 <= minute <= 59):
-        raise ValueError("Invalid time - hour must be 0-23, minute must be 0-59")
-    
-    return time(hour, minute)
+    try:
+        return datetime.strptime(time_str.strip(), "%H:%M").time()
+    except ValueError:
+        raise ValueError("Time must be in HH:MM format (e.g., 20:00), hour 0-23 and minute 0-59") from None
 
 def text_to_emoji_letters(text: str, max_chars: int = 20) -> str:
     """
@@ -559,6 +546,30 @@ def create_raid_event(guild_id: int, channel_id: int, message_id: int, title: st
     
     return event_id
 
+def set_raid_event_message_id(event_id: int, message_id: int):
+    """Point a raid event at its Discord message (used once the message has been sent)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        UPDATE raid_events SET message_id = %s WHERE id = %s
+    """, (message_id, event_id))
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def delete_raid_event(event_id: int):
+    """Delete a raid event that never got a Discord message"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("DELETE FROM raid_events WHERE id = %s", (event_id,))
+    
+    conn.commit()
+    cursor.close()
+    conn.close()
+
 def get_raid_event(message_id: int):
     """Get raid event by message ID"""
     conn = get_db_connection()
@@ -772,12 +783,16 @@ def are_signups_closed(event_id: int) -> bool:
     if not event:
         return False
     
+    return _signups_closed_for(event)
+
+def _signups_closed_for(event) -> bool:
+    """Check an event row's signups_closed flag and signup_deadline"""
     # Manually closed
-    if event['signups_closed']:
+    if event.get('signups_closed'):
         return True
     
     # Auto-closed by deadline
-    if event['signup_deadline']:
+    if event.get('signup_deadline'):
         now = datetime.now(timezone.utc)
         if now >= event['signup_deadline']:
             return True
@@ -1079,16 +1094,23 @@ def get_user_reminder(event_id: int, discord_id: str):
 # EMBED GENERATION
 # ============================================================================
 
-def generate_raid_embed(event_id: int):
-    """Generate the raid event embed with all signups"""
-    # Get event details
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+def generate_raid_embed(event_id: int, new_event: dict = None):
+    """Generate the raid event embed with all signups
     
-    cursor.execute("SELECT * FROM raid_events WHERE id = %s", (event_id,))
-    event = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    Pass new_event (the fields of an event that was just created) to build the
+    embed without any database queries - a brand new event has no signups yet.
+    """
+    if new_event is not None:
+        event = new_event
+    else:
+        # Get event details
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        cursor.execute("SELECT * FROM raid_events WHERE id = %s", (event_id,))
+        event = cursor.fetchone()
+        cursor.close()
+        conn.close()
     
     if not event:
         return None
@@ -1146,7 +1168,7 @@ def generate_raid_embed(event_id: int):
         )
     
     # Check if signups are closed
-    signups_closed = are_signups_closed(event_id)
+    signups_closed = _signups_closed_for(event)
     
     if signups_closed:
         embed.add_field(
@@ -1163,12 +1185,16 @@ def generate_raid_embed(event_id: int):
         )
     
     # Get all signup counts for overview
-    signed_signups = get_raid_signups(event_id, 'signed')
-    late_signups = get_raid_signups(event_id, 'late')
-    tentative_signups = get_raid_signups(event_id, 'tentative')
-    benched_signups = get_raid_signups(event_id, 'benched')
-    absent_signups = get_raid_signups(event_id, 'absent')
-    reservations = get_raid_reservations(event_id)
+    if new_event is not None:
+        signed_signups = late_signups = tentative_signups = benched_signups = absent_signups = []
+        reservations = []
+    else:
+        signed_signups = get_raid_signups(event_id, 'signed')
+        late_signups = get_raid_signups(event_id, 'late')
+        tentative_signups = get_raid_signups(event_id, 'tentative')
+        benched_signups = get_raid_signups(event_id, 'benched')
+        absent_signups = get_raid_signups(event_id, 'absent')
+        reservations = get_raid_reservations(event_id)
     
     # Calculate signup summary: "20(+4)" format where +4 is late+tentative
     signed_count = len(signed_signups)
@@ -1500,25 +1526,32 @@ async def refresh_event_embed(bot, event_id: int):
 # DISCORD UI COMPONENTS
 # ============================================================================
 
+BATTLENET_CONNECT_DESCRIPTION = (
+    "Click the button below to authorize LuminisBot to access your World of Warcraft character information.\n\n"
+    "**What we'll access:**\n"
+    "• Character names and realms\n"
+    "• Character classes and levels\n"
+    "• Basic character stats\n\n"
+    "**Privacy:** Your data is only used for guild features and is never shared."
+)
+
+@functools.lru_cache(maxsize=1)
+def _battlenet_authorize_base() -> str:
+    """Authorize URL prefix derived from BLIZZARD_REDIRECT_URI (computed once, on first use)"""
+    redirect_uri = os.getenv('BLIZZARD_REDIRECT_URI')
+    return f"{redirect_uri.replace('/callback', '')}/authorize?discord_id="
+
 def build_battlenet_connect_response(discord_id: str, title: str = "🎮 Connect Your WoW Characters"):
     """Build the embed + view with a Battle.net authorize link button.
 
     Returns (embed, view). Used by /connectwow, the signup flow, and the
     Update Characters button so users always get a direct authorize link.
     """
-    redirect_uri = os.getenv('BLIZZARD_REDIRECT_URI')
-    auth_url = f"{redirect_uri.replace('/callback', '')}/authorize?discord_id={discord_id}"
+    auth_url = f"{_battlenet_authorize_base()}{discord_id}"
 
     embed = discord.Embed(
         title=title,
-        description=(
-            "Click the button below to authorize LuminisBot to access your World of Warcraft character information.\n\n"
-            "**What we'll access:**\n"
-            "• Character names and realms\n"
-            "• Character classes and levels\n"
-            "• Basic character stats\n\n"
-            "**Privacy:** Your data is only used for guild features and is never shared."
-        ),
+        description=BATTLENET_CONNECT_DESCRIPTION,
         color=0x00ff00
     )
 
@@ -1584,21 +1617,32 @@ class RaidButtonsView(View):
         await handle_admin_panel_click(interaction)
 
 
+# RaidButtonsView is persistent (timeout=None, fixed custom_ids), so a single
+# instance can be attached to every raid message that has no extra buttons.
+_persistent_raid_view = None
+
+def get_persistent_raid_view():
+    """Get the shared RaidButtonsView instance, creating it on first use"""
+    global _persistent_raid_view
+    if _persistent_raid_view is None:
+        _persistent_raid_view = RaidButtonsView()
+    return _persistent_raid_view
+
 def create_raid_buttons_view(log_url: str = None):
     """Create raid buttons view with optional Show Logs button"""
-    view = RaidButtonsView()
+    if not log_url:
+        return get_persistent_raid_view()
     
-    # Add Show Logs button if log URL exists
-    if log_url:
-        # Discord link buttons open URLs directly
-        show_logs_button = Button(
-            label="Show Logs",
-            style=discord.ButtonStyle.link,
-            emoji="📊",
-            url=log_url,
-            row=2
-        )
-        view.add_item(show_logs_button)
+    # Add Show Logs button; Discord link buttons open URLs directly
+    view = RaidButtonsView()
+    show_logs_button = Button(
+        label="Show Logs",
+        style=discord.ButtonStyle.link,
+        emoji="📊",
+        url=log_url,
+        row=2
+    )
+    view.add_item(show_logs_button)
     
     return view
 
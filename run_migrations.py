@@ -648,6 +648,18 @@ def run_migrations():
 
         logger.info("[MIGRATIONS] ✓ mythicplus tables ready")
 
+        # ============================================================================
+        # CHARACTER LISTING INDEX
+        # ============================================================================
+
+        # Lets /mycharacters read a user's top 25 characters straight off the index
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_wow_characters_discord_level_nulls_last
+            ON wow_characters(discord_id, level DESC NULLS LAST, character_name);
+        """)
+
+        logger.info("[MIGRATIONS] ✓ wow_characters listing index ready")
+
         conn.commit()
         cursor.close()
         conn.close()
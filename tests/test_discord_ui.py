@@ -0,0 +1,141 @@
+"""
+Unit tests for the fight dropdown paging, the deaths table and channel send pacing.
+Run with:  python -m unittest discover tests
+Needs discord_ui's dependencies (discord.py, aiohttp, psycopg2) but no bot
+connection or network access.
+"""
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import discord_ui
+    from discord_ui import (CHANNEL_SEND_LIMIT, CHANNEL_SEND_PERIOD, FIGHTS_PER_PAGE,
+                            FightSelect, format_deaths_table, wait_for_channel_send_slot)
+except ImportError as e:
+    raise unittest.SkipTest(f"discord_ui dependencies not installed ({e.name})")
+
+FIGHT_START = 1_000_000
+
+
+def deaths(count):
+    return {
+        'events': [
+            {'type': 'death', 'targetID': i, 'killingAbilityGameID': 1,
+             'timestamp': FIGHT_START + i * 1000}
+            for i in range(count)
+        ],
+        'players': {i: f"Player{i}" for i in range(count)},
+        'abilities': {1: "Annihilate"},
+    }
+
+
+class FormatDeathsTableTests(unittest.TestCase):
+
+    def test_without_max_chars_every_death_is_listed(self):
+        table = format_deaths_table(deaths(30), FIGHT_START, encounter_name="Boss")
+        self.assertIn("Player29", table)
+        self.assertNotIn("truncated", table)
+
+    def test_max_chars_truncates_rows(self):
+        full = format_deaths_table(deaths(30), FIGHT_START, encounter_name="Boss")
+        max_chars = len(full) // 2
+        table = format_deaths_table(deaths(30), FIGHT_START, encounter_name="Boss", max_chars=max_chars)
+
+        self.assertLessEqual(len(table), max_chars)
+        self.assertTrue(table.startswith("```ansi\nDeaths on Boss"))
+        self.assertIn("Timestamp | Name", table)
+        self.assertIn("Player0 ", table)
+        self.assertNotIn("Player29", table)
+        self.assertTrue(table.endswith("(Table truncated - too many deaths to display)\n```"))
+
+    def test_max_chars_that_fits_leaves_table_unchanged(self):
+        full = format_deaths_table(deaths(5), FIGHT_START, encounter_name="Boss")
+        self.assertEqual(format_deaths_table(deaths(5), FIGHT_START, encounter_name="Boss", max_chars=len(full)), full)
+
+
+def wipes(count):
+    return [{'id': i, 'name': "Boss", 'kill': False} for i in range(1, count + 1)]
+
+
+def option_values(select):
+    return [option.value for option in select.options]
+
+
+class FightSelectPagingTests(unittest.TestCase):
+
+    def choose(self, select, value):
+        interaction = mock.MagicMock()
+        interaction.response.edit_message = mock.AsyncMock()
+        with mock.patch.object(FightSelect, 'values', new_callable=mock.PropertyMock, return_value=[value]):
+            asyncio.run(select.callback(interaction))
+        interaction.response.edit_message.assert_awaited_once()
+
+    def test_short_fight_list_is_not_paged(self):
+        select = FightSelect(wipes(25), "abc", "deaths")
+        self.assertEqual(option_values(select), [str(i) for i in range(1, 26)])
+
+    def test_next_and_previous_pages(self):
+        select = FightSelect(wipes(30), "abc", "deaths")
+        first_page = [str(i) for i in range(1, FIGHTS_PER_PAGE + 1)]
+        self.assertEqual(option_values(select), first_page + ["page:next"])
+
+        self.choose(select, "page:next")
+        self.assertEqual(option_values(select), ["page:prev"] + [str(i) for i in range(FIGHTS_PER_PAGE + 1, 31)])
+
+        self.choose(select, "page:prev")
+        self.assertEqual(option_values(select), first_page + ["page:next"])
+
+    def test_middle_page_has_both_page_entries(self):
+        select = FightSelect(wipes(2 * FIGHTS_PER_PAGE + 1), "abc", "deaths")
+        self.choose(select, "page:next")
+        values = option_values(select)
+        self.assertEqual(values[0], "page:prev")
+        self.assertEqual(values[-1], "page:next")
+        self.assertEqual(len(values), FIGHTS_PER_PAGE + 2)
+
+
+class ChannelSendPacingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+        async def fake_sleep(delay):
+            self.sleeps.append(delay)
+
+        for patcher in (mock.patch.object(discord_ui.time, 'monotonic', side_effect=lambda: self.now),
+                        mock.patch.object(discord_ui.asyncio, 'sleep', side_effect=fake_sleep),
+                        mock.patch.dict(discord_ui._channel_send_slots, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def send(self, channel_id):
+        asyncio.run(wait_for_channel_send_slot(channel_id))
+
+    def test_burst_past_the_limit_waits_for_the_window(self):
+        for _ in range(CHANNEL_SEND_LIMIT):
+            self.send(1)
+        self.assertEqual(self.sleeps, [])
+        self.send(1)
+        self.assertEqual(self.sleeps, [CHANNEL_SEND_PERIOD])
+
+    def test_channels_are_paced_separately(self):
+        for _ in range(CHANNEL_SEND_LIMIT):
+            self.send(1)
+        self.send(2)
+        self.assertEqual(self.sleeps, [])
+
+    def test_idle_channels_are_forgotten(self):
+        self.send(1)
+        self.now += CHANNEL_SEND_PERIOD
+        self.send(2)
+        self.assertEqual(set(discord_ui._channel_send_slots), {2})
+
+
+if __name__ == '__main__':
+    unittest.main()
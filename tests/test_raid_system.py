@@ -0,0 +1,61 @@
+"""
+Unit tests for the raid event date/time parsing.
+Run with:  python -m unittest discover tests
+Needs raid_system's dependencies (discord.py, psycopg2) but no database.
+"""
+import sys
+import unittest
+from datetime import date, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    from raid_system import parse_date, parse_time
+except ImportError as e:
+    raise unittest.SkipTest(f"raid_system dependencies not installed ({e.name})")
+
+
+class ParseDateTests(unittest.TestCase):
+
+    def test_accepted_formats(self):
+        for text in ("25/12/2025", "25.12.2025", "2025-12-25", "  25/12/2025 "):
+            with self.subTest(text=text):
+                self.assertEqual(parse_date(text), date(2025, 12, 25))
+
+    def test_single_digit_day_and_month(self):
+        self.assertEqual(parse_date("5/1/2026"), date(2026, 1, 5))
+        self.assertEqual(parse_date("2026-1-5"), date(2026, 1, 5))
+
+    def test_error_names_the_format_that_was_attempted(self):
+        cases = {
+            "25/12": "DD/MM/YYYY",
+            "31.02.2025": "DD.MM.YYYY",
+            "2025-13-01": "YYYY-MM-DD",
+        }
+        for text, expected_format in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, expected_format):
+                    parse_date(text)
+
+    def test_no_separator(self):
+        with self.assertRaisesRegex(ValueError, "DD/MM/YYYY, DD.MM.YYYY, or YYYY-MM-DD"):
+            parse_date("25122025")
+
+
+class ParseTimeTests(unittest.TestCase):
+
+    def test_valid_times(self):
+        self.assertEqual(parse_time("20:00"), time(20, 0))
+        self.assertEqual(parse_time(" 0:05 "), time(0, 5))
+        self.assertEqual(parse_time("23:59"), time(23, 59))
+
+    def test_invalid_times(self):
+        for text in ("24:00", "12:60", "8pm", "12", ""):
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, "HH:MM"):
+                    parse_time(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Unit tests for the TTL/LRU cache and the shared report context in wcl_api.
+Run with:  python -m unittest discover tests
+Needs wcl_api's dependencies (aiohttp, python-dotenv) but no network access.
+"""
+import asyncio
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import wcl_api
+except ImportError as e:
+    raise unittest.SkipTest(f"wcl_api dependencies not installed ({e.name})")
+
+from wcl_api import ReportContext, TTLCache
+
+
+class TTLCacheExpiryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(wcl_api.time, 'monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_is_returned_before_ttl(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set('a', 1)
+        self.now += 59.9
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_entry_expires_at_ttl(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set('a', 1)
+        self.now += 60
+        self.assertIsNone(cache.get('a'))
+        # The expired entry is dropped, not just hidden
+        self.assertNotIn('a', cache._entries)
+
+    def test_set_refreshes_expiry(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set('a', 1)
+        self.now += 50
+        cache.set('a', 2)
+        self.now += 50
+        self.assertEqual(cache.get('a'), 2)
+
+    def test_missing_key(self):
+        self.assertIsNone(TTLCache(maxsize=4, ttl=60).get('missing'))
+
+
+class TTLCacheEvictionTests(unittest.TestCase):
+
+    def test_oldest_entry_is_evicted_past_maxsize(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_get_marks_entry_as_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_overwriting_does_not_evict(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('a', 3)
+        self.assertEqual(cache.get('a'), 3)
+        self.assertEqual(cache.get('b'), 2)
+
+
+class ReportContextBossHealthTests(unittest.TestCase):
+    """ensure_boss_health keeps a successful scrape and retries a failed (empty) one."""
+
+    def ensure_twice(self, *scrape_results):
+        ctx = ReportContext("abc")
+        scrape = mock.AsyncMock(side_effect=scrape_results)
+        scraper = types.SimpleNamespace(get_all_boss_health_for_report=scrape)
+        with mock.patch.dict(sys.modules, {'wcl_web_scraper': scraper}):
+            returned = [asyncio.run(ctx.ensure_boss_health(None)) for _ in range(2)]
+        return ctx, scrape, returned
+
+    def test_successful_scrape_is_reused(self):
+        ctx, scrape, returned = self.ensure_twice({3: 41.5})
+        self.assertEqual(returned, [{3: 41.5}, {3: 41.5}])
+        scrape.assert_awaited_once()
+
+    def test_empty_scrape_is_retried(self):
+        ctx, scrape, returned = self.ensure_twice({}, {3: 41.5})
+        self.assertEqual(returned, [{}, {3: 41.5}])
+        self.assertEqual(scrape.await_count, 2)
+        self.assertEqual(ctx.boss_health, {3: 41.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,32 +2,234 @@
 # Warcraft Logs API functions
 
 import os
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import lru_cache
 import aiohttp
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
+# orjson encodes the GraphQL requests and decodes the larger responses several
+# times faster than the stdlib; fall back to json if it isn't installed.
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 load_dotenv()
 WCL_CLIENT_ID = os.getenv('WCL_CLIENT_ID')
 WCL_CLIENT_SECRET = os.getenv('WCL_CLIENT_SECRET')
 WCL_GUILD_ID = 771376  # Example Guild ID
+WCL_API_URL = "https://www.warcraftlogs.com/api/v2/client"
+
+# Shared HTTP session, kept for the bot's lifetime so keep-alive connections
+# and DNS lookups to warcraftlogs.com are reused between requests.
+_http_session = None
+# Without a timeout a stalled WCL response would hold a connection (and the
+# interaction waiting on it) for aiohttp's 5 minute default.
+WCL_REQUEST_TIMEOUT_SECONDS = 30
+
+def get_http_session():
+    """Get the shared aiohttp session for WCL requests, creating it on first use."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        logger.debug("WCL: Creating shared HTTP session.")
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, keepalive_timeout=75, ttl_dns_cache=600),
+            # The web scraper's warm-up request relies on cookies persisting between calls
+            cookie_jar=aiohttp.CookieJar(),
+            json_serialize=json_dumps,
+            timeout=aiohttp.ClientTimeout(total=WCL_REQUEST_TIMEOUT_SECONDS),
+            # br/zstd responses (advertised by the scraper) are decoded via the
+            # Brotli and zstandard packages from requirements.txt
+            auto_decompress=True
+        )
+    return _http_session
+
+async def close_http_session():
+    """Close the shared WCL session (call on shutdown)."""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        logger.debug("WCL: Closing shared HTTP session.")
+        await _http_session.close()
+    _http_session = None
+
+def dig(data, *keys):
+    """Walk nested dicts along keys, returning None as soon as one is missing or null."""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+@lru_cache(maxsize=64)
+def _compact_query(query):
+    """Collapse a GraphQL query's indentation and newlines to single spaces.
+
+    The queries only contain single-spaced string literals, so this never
+    changes their meaning; it just keeps the whitespace out of every request body.
+    """
+    return _WHITESPACE_RUN.sub(' ', query).strip()
+
+# Transient WCL failures (connection errors, 429 and 5xx) are retried with
+# capped exponential backoff plus jitter, honouring Retry-After when sent.
+WCL_REQUEST_ATTEMPTS = 3
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 60.0
+
+def _backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based)."""
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP_SECONDS, float(retry_after))
+        except ValueError:
+            pass
+    return min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)) + random.uniform(0, BACKOFF_BASE_SECONDS)
+
+async def _request_with_backoff(session, method, url, **kwargs):
+    """Send a WCL request, retrying connection errors and transient statuses.
+
+    Returns (status, body): body is the decoded JSON of a 200 response and the
+    response text otherwise. status is None if no attempt got a response.
+    """
+    status, body = None, None
+    for attempt in range(WCL_REQUEST_ATTEMPTS):
+        retry_after = None
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                status = response.status
+                if status == 200:
+                    return status, json_loads(await response.read())
+                body = await response.text()
+                if status not in RETRYABLE_STATUSES:
+                    return status, body
+                retry_after = response.headers.get('Retry-After')
+                logger.error("WCL: Request to %s failed with status %s.", url, status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("WCL: Request to %s failed: %s", url, e)
+            status, body = None, None
+        if attempt < WCL_REQUEST_ATTEMPTS - 1:
+            await asyncio.sleep(_backoff_delay(attempt, retry_after))
+    return status, body
+
+class TTLCache:
+    """Small LRU cache whose entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+# A fight's data doesn't change once WCL lists it, so bundles are kept for an
+# hour; a report's fight list still grows while a raid is being logged live, so
+# it is only kept briefly. Bundles can be large (tables, death events), hence
+# the smaller size.
+_fights_cache = TTLCache(maxsize=128, ttl=60)
+_report_bundle_cache = TTLCache(maxsize=64, ttl=3600)
+
+# Client-credentials tokens are valid for hours; remember the last one so
+# callers don't POST to oauth/token on every request.
+_wcl_token_cache = {"token": None, "expires_at": 0.0}
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+# Serialises refreshes so concurrent interactions wait for one token request
+# instead of each fetching their own.
+_wcl_token_lock = asyncio.Lock()
+
+@lru_cache(maxsize=4)
+def _auth_headers(token):
+    """Authorization headers for a token, built once per token and shared (never mutate them)."""
+    return {'Authorization': f'Bearer {token}'}
 
 async def get_wcl_token(session):
     """Get an OAuth token for WCL API access."""
-    print("[DEBUG] WCL: Requesting new API token.")
+    logger.debug("WCL: Requesting new API token.")
     url = "https://www.warcraftlogs.com/oauth/token"
     data = {'grant_type': 'client_credentials'}
     auth = aiohttp.BasicAuth(WCL_CLIENT_ID, WCL_CLIENT_SECRET)
-    try:
-        async with session.post(url, data=data, auth=auth) as response:
-            response.raise_for_status()
-            print("[DEBUG] WCL: API token received successfully.")
-            return (await response.json())['access_token']
-    except aiohttp.ClientError as e:
-        print(f"[ERROR] WCL: Failed to get token. Status: {e}")
+    status, token_data = await _request_with_backoff(session, "POST", url, data=data, auth=auth)
+    if status != 200:
+        logger.error("WCL: Failed to get token. Status: %s", status)
         return None
+    logger.debug("WCL: API token received successfully.")
+    _wcl_token_cache["token"] = token_data['access_token']
+    _wcl_token_cache["expires_at"] = time.monotonic() + token_data.get('expires_in', 3600)
+    return token_data['access_token']
+
+async def get_cached_wcl_token(session):
+    """Get a WCL token, reusing the cached one until shortly before it expires."""
+    if _has_fresh_wcl_token():
+        return _wcl_token_cache["token"]
+    async with _wcl_token_lock:
+        # Another caller may have refreshed it while we waited for the lock
+        if _has_fresh_wcl_token():
+            return _wcl_token_cache["token"]
+        return await get_wcl_token(session)
+
+def _has_fresh_wcl_token():
+    """Check whether the cached token is set and not about to expire."""
+    return bool(_wcl_token_cache["token"]) and time.monotonic() < _wcl_token_cache["expires_at"] - TOKEN_EXPIRY_MARGIN_SECONDS
+
+def invalidate_wcl_token(token=None):
+    """Forget the cached token, e.g. after WCL rejected it with 401/403.
+
+    If token is given, the cache is only cleared while it still holds that token,
+    so a stale token held by one caller can't discard a fresh one fetched since.
+    """
+    if token is not None and _wcl_token_cache["token"] != token:
+        return
+    _wcl_token_cache["token"] = None
+    _wcl_token_cache["expires_at"] = 0.0
+
+async def _graphql_request(session, token, query, variables):
+    """POST a GraphQL query to the WCL API through _request_with_backoff.
+
+    If WCL rejects the token (401/403) the cached one is dropped and the query is
+    retried once with a fresh token. Returns (status, body) like _request_with_backoff.
+    """
+    payload = {'query': _compact_query(query), 'variables': variables}
+    status, data = await _request_with_backoff(session, "POST", WCL_API_URL, json=payload, headers=_auth_headers(token))
+    if status in (401, 403):
+        logger.error("WCL: Token rejected with status %s, requesting a new one.", status)
+        invalidate_wcl_token(token)
+        token = await get_cached_wcl_token(session)
+        if token:
+            status, data = await _request_with_backoff(session, "POST", WCL_API_URL, json=payload, headers=_auth_headers(token))
+    return status, data
 
 async def get_latest_log(session, token):
     """Get the latest log for the configured guild."""
-    print("[DEBUG] WCL: Fetching latest log for guild.")
+    logger.debug("WCL: Fetching latest log for guild.")
     query = """
     query($guildID: Int!) {
         reportData {
@@ -43,21 +245,22 @@ async def get_latest_log(session, token):
     }
     """
     variables = {'guildID': WCL_GUILD_ID}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as resp:
-        if resp.status == 200:
-            reports_data = (await resp.json()).get('data', {}).get('reportData', {}).get('reports', {}).get('data', [])
-            return reports_data[0] if reports_data else None
-        return None
+    status, data = await _graphql_request(session, token, query, variables)
+    if status == 200:
+        reports_data = dig(data, 'data', 'reportData', 'reports', 'data') or []
+        return reports_data[0] if reports_data else None
+    return None
 
-async def get_latest_logs(session, token, limit=5):
-    """Get the N most recent logs for the configured guild."""
-    print(f"[DEBUG] WCL: Fetching latest {limit} logs for guild.")
+async def get_latest_logs(session, token, limit=5, since_ms=0):
+    """Get the N most recent logs for the configured guild.
+
+    If since_ms is given, only logs that started after it (ms since epoch) are returned.
+    """
+    logger.debug("WCL: Fetching latest %s logs for guild (since %s).", limit, since_ms)
     query = """
-    query($guildID: Int!, $limit: Int!) {
+    query($guildID: Int!, $limit: Int!, $startTime: Float) {
         reportData {
-            reports(guildID: $guildID, limit: $limit) {
+            reports(guildID: $guildID, limit: $limit, startTime: $startTime) {
                 data {
                     code,
                     title,
@@ -68,18 +271,18 @@ async def get_latest_logs(session, token, limit=5):
         }
     }
     """
-    variables = {'guildID': WCL_GUILD_ID, 'limit': limit}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as resp:
-        if resp.status == 200:
-            reports_data = (await resp.json()).get('data', {}).get('reportData', {}).get('reports', {}).get('data', [])
-            return reports_data
-        return []
+    variables = {'guildID': WCL_GUILD_ID, 'limit': limit, 'startTime': since_ms + 1 if since_ms else None}
+    status, data = await _graphql_request(session, token, query, variables)
+    if status == 200:
+        return dig(data, 'data', 'reportData', 'reports', 'data') or []
+    return []
 
 async def get_fights_from_report(session, token, report_code):
     """Get all boss fights from a report."""
-    print(f"[DEBUG] WCL: Fetching fights for report: {report_code}")
+    cached = _fights_cache.get(report_code)
+    if cached is not None:
+        return cached
+    logger.debug("WCL: Fetching fights for report: %s", report_code)
     query = """
     query($reportCode: String!) {
         reportData {
@@ -92,88 +295,266 @@ async def get_fights_from_report(session, token, report_code):
     }
     """
     variables = {"reportCode": report_code}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as response:
-        if response.status == 200:
-            data = await response.json()
-            return data.get('data', {}).get('reportData', {}).get('report', {}).get('fights', [])
-        return []
-
-async def get_fight_details_with_compare_type(session, token, report_code, fight_id, encounter_id, difficulty, metric, compare_type="Rankings"):
-    """Get basic fight details including table data and player information."""
-    print(f"[DEBUG] WCL: Fetching basic fight details for report: {report_code}, fight ID: {fight_id}, metric: {metric}")
-    table_data_type = "DamageDone" if metric == "dps" else "Healing"
-    
-    query = """
-    query($reportCode: String!, $fightIDs: [Int]!, $tableDataType: TableDataType!) {
-      reportData {
-        report(code: $reportCode) {
-          table(fightIDs: $fightIDs, dataType: $tableDataType)
-          fights(fightIDs: $fightIDs) {
-            id, startTime, endTime, friendlyPlayers
-          }
-          playerDetails(fightIDs: $fightIDs, includeCombatantInfo: true)
-          masterData {
+    status, data = await _graphql_request(session, token, query, variables)
+    if status == 200:
+        fights = dig(data, 'data', 'reportData', 'report', 'fights') or []
+        _fights_cache.set(report_code, fights)
+        return fights
+    return []
+
+# Table aliases requested per metric in get_report_bundle
+REPORT_BUNDLE_TABLES = {
+    "dps": ("damage", "DamageDone"),
+    "hps": ("healing", "Healing"),
+}
+
+async def get_report_bundle(session, token, report_code, fight_ids, metrics=(), include_deaths=False, include_master_data=True, rankings=None, allow_partial=False, deaths_by_type=True):
+    """Get everything the fight views need for a report in a single GraphQL request.
+
+    The document always returns fights, playerDetails and masterData for the given
+    fight IDs, plus one aliased table per metric ("damage" for dps, "healing" for
+    hps) and, with include_deaths, the death events as "deaths" (Deaths data type)
+    and "filteredDeaths" (type = 'death' filter expression). Note that WCL
+    aggregates tables and playerDetails over all requested fights. masterData is
+    report-wide, so callers that already hold it (see ReportContext) can leave it
+    out with include_master_data=False. rankings=(metric, compare_type) adds the
+    fights' character rankings as "rankings". deaths_by_type=False leaves the
+    "deaths" selection out and only requests "filteredDeaths". Results are cached (see
+    _report_bundle_cache); callers get their own shallow copy to add keys to.
+
+    A GraphQL error normally fails the whole bundle (None). With allow_partial the
+    selections that did resolve are returned instead (uncached), for callers that
+    can make do with some of them, e.g. either of the two death selections.
+    """
+    cache_key = (report_code, tuple(fight_ids), tuple(metrics), include_deaths, include_master_data, rankings, deaths_by_type)
+    cached = _report_bundle_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    logger.debug("WCL: Fetching report bundle for report: %s, fights: %s, metrics: %s", report_code, fight_ids, list(metrics))
+    fields = [
+        f"{REPORT_BUNDLE_TABLES[metric][0]}: table(fightIDs: $fightIDs, dataType: {REPORT_BUNDLE_TABLES[metric][1]})"
+        for metric in metrics
+    ]
+    if include_deaths:
+        # Both death selections ride along in the same request; the filtered one
+        # covers reports where the Deaths data type comes back empty.
+        if deaths_by_type:
+            fields.append("deaths: events(fightIDs: $fightIDs, dataType: Deaths, startTime: 0, endTime: 99999999999) { data }")
+        fields.append("filteredDeaths: events(fightIDs: $fightIDs, startTime: 0, endTime: 99999999999, filterExpression: \"type = 'death'\") { data }")
+    if rankings:
+        ranking_metric, compare_type = rankings
+        fields.append(f"rankings(fightIDs: $fightIDs, playerMetric: {ranking_metric}, compare: {compare_type})")
+    abilities = "abilities { gameID name }" if include_deaths else ""
+    master_data = """masterData {
             actors(type: "Player") {
               id
               name
               type
               subType
             }
+            %s
+          }""" % abilities if include_master_data else ""
+
+    query = """
+    query($reportCode: String!, $fightIDs: [Int]!) {
+      reportData {
+        report(code: $reportCode) {
+          %s
+          fights(fightIDs: $fightIDs) {
+            id, startTime, endTime, friendlyPlayers
           }
+          playerDetails(fightIDs: $fightIDs, includeCombatantInfo: true)
+          %s
         }
       }
     }
+    """ % ("\n          ".join(fields), master_data)
+    variables = {"reportCode": report_code, "fightIDs": list(fight_ids)}
+    status, data = await _graphql_request(session, token, query, variables)
+    if status == 200:
+        if 'errors' in data:
+            logger.error("WCL API returned GraphQL errors: %s", data['errors'])
+            report = dig(data, 'data', 'reportData', 'report')
+            if allow_partial and report:
+                return dict(report)
+            return None
+        report = dig(data, 'data', 'reportData', 'report') or {}
+        _report_bundle_cache.set(cache_key, report)
+        return dict(report)
+    else:
+        logger.error("WCL API returned non-200 status %s: %s", status, data)
+        return None
+
+def _build_master_maps(master_data):
+    """Build (players, abilities) name maps from a report's masterData.
+
+    players maps player actor ID -> name, abilities maps ability game ID -> name.
     """
-    variables = {
-        "reportCode": report_code,
-        "fightIDs": [fight_id],
-        "tableDataType": table_data_type
+    master_data = master_data or {}
+    players = {
+        actor.get('id'): actor.get('name', 'Unknown')
+        for actor in master_data.get('actors') or []
+        if actor.get('type') == 'Player'
     }
-    
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
-    
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as response:
-        if response.status == 200:
-            data = await response.json()
+    abilities = {
+        ability.get('gameID'): ability.get('name', 'Unknown')
+        for ability in master_data.get('abilities') or []
+    }
+    return players, abilities
+
+class ReportContext:
+    """Report-wide data shared by every fight lookup on one report.
+
+    A fight dropdown keeps one of these, so the player/ability names and the boss
+    health of every wipe are fetched once per report instead of once per
+    selected fight.
+    """
+
+    def __init__(self, report_code):
+        self.report_code = report_code
+        self.players = None
+        self.abilities = None
+        self.boss_health = None
+        self._master_data_lock = asyncio.Lock()
+        self._boss_health_lock = asyncio.Lock()
+
+    async def ensure_master_data(self, session, token):
+        """Load the report's player and ability names (once)."""
+        async with self._master_data_lock:
+            if self.players is not None:
+                return
+            query = """
+            query($reportCode: String!) {
+                reportData {
+                    report(code: $reportCode) {
+                        masterData {
+                            actors(type: "Player") {
+                                id
+                                name
+                                type
+                            }
+                            abilities {
+                                gameID
+                                name
+                            }
+                        }
+                    }
+                }
+            }
+            """
+            variables = {"reportCode": self.report_code}
+            status, data = await _graphql_request(session, token, query, variables)
+            if status != 200:
+                logger.error("Master data query failed with status %s", status)
+                return
             if 'errors' in data:
-                print(f"[ERROR] WCL API returned GraphQL errors: {data['errors']}")
-                return None
-            
-            result = data.get('data', {}).get('reportData', {}).get('report', {})
-            print(f"[DEBUG] Basic fight details retrieved successfully for {metric}")
-            
-            # Check if we have table data
-            if 'table' in result:
-                table = result['table']
-                if isinstance(table, dict) and 'data' in table:
-                    table_data = table['data']
-                    if isinstance(table_data, dict) and 'entries' in table_data:
-                        entries = table_data['entries']
-            
-            return result
-        else:
-            response_text = await response.text()
-            print(f"[ERROR] WCL API returned non-200 status {response.status}: {response_text}")
-            return None
+                logger.error("Master data query returned GraphQL errors: %s", data['errors'])
+                return
+
+            master_data = dig(data, 'data', 'reportData', 'report', 'masterData')
+            self.players, self.abilities = _build_master_maps(master_data)
+
+    async def ensure_boss_health(self, session):
+        """Load the boss health of every wipe in the report.
 
-async def get_fight_details(session, token, report_code, fight_id, encounter_id, difficulty, metric, is_kill=False):
-    """Get complete fight details including web scraped parse data."""
-    print(f"[DEBUG] WCL: Fetching fight details for report: {report_code}, fight ID: {fight_id}, metric: {metric}")
+        Only a non-empty result is kept; an empty one (which is also what a failed
+        scrape returns) is retried on the next call.
+        """
+        # Import here to avoid circular import
+        from wcl_web_scraper import get_all_boss_health_for_report
+
+        async with self._boss_health_lock:
+            if self.boss_health:
+                return self.boss_health
+            boss_health = await get_all_boss_health_for_report(session, self.report_code)
+            if boss_health:
+                self.boss_health = boss_health
+            return boss_health
+
+async def get_fight_details_with_compare_type(session, token, report_code, fight_id, encounter_id, difficulty, metric, compare_type="Rankings", include_rankings=False):
+    """Get basic fight details including table data and player information.
+
+    With include_rankings the fight's character rankings for the metric are
+    returned under 'rankings' as well.
+    """
+    logger.debug("WCL: Fetching basic fight details for report: %s, fight ID: %s, metric: %s", report_code, fight_id, metric)
+    rankings = (metric, compare_type) if include_rankings else None
+    result = await get_report_bundle(session, token, report_code, [fight_id], metrics=[metric], rankings=rankings)
+    if result is None:
+        return None
+
+    # Callers expect the metric's table under its plain name
+    result['table'] = result.pop(REPORT_BUNDLE_TABLES[metric][0], None)
+    logger.debug("Basic fight details retrieved successfully for %s", metric)
+    return result
+
+def _has_character_rankings(rankings):
+    """Check whether a report rankings result has any ranked characters."""
+    for fight_rankings in dig(rankings, 'data') or []:
+        roles = fight_rankings.get('roles') if isinstance(fight_rankings, dict) else None
+        for role_data in (roles or {}).values():
+            if isinstance(role_data, dict) and role_data.get('characters'):
+                return True
+    return False
+
+# Upper bound on WCL requests one fight lookup fans out at a time
+WCL_FETCH_CONCURRENCY = 8
+_wcl_fetch_slots = asyncio.Semaphore(WCL_FETCH_CONCURRENCY)
+
+async def _bounded_wcl_fetch(coro):
+    """Await a WCL request while holding one of the shared fetch slots."""
+    async with _wcl_fetch_slots:
+        return await coro
+
+async def get_fight_details(session, token, report_code, fight_id, encounter_id, difficulty, metric, is_kill=False, start_time=None, end_time=None):
+    """Get complete fight details including parse data.
+
+    Kills are ranked by WCL, so their parse percentiles come from the GraphQL
+    rankings in the same request. The web scrape is the fallback for wipes and
+    for kills without rankings. When the caller already knows the fight's
+    start_time and end_time (e.g. from get_fights_from_report), the GraphQL
+    query and the web scrape are independent and run concurrently; otherwise the
+    times are read from the GraphQL result first.
+    """
+    logger.debug("WCL: Fetching fight details for report: %s, fight ID: %s, metric: %s", report_code, fight_id, metric)
     
     # Import here to avoid circular import
     from wcl_web_scraper import scrape_wcl_web_data
     
+    fight_details = None
+    if is_kill and encounter_id:
+        fight_details = await get_fight_details_with_compare_type(
+            session, token, report_code, fight_id, encounter_id, difficulty, metric, include_rankings=True
+        )
+        if fight_details and _has_character_rankings(fight_details.get('rankings')):
+            return fight_details
+        logger.debug("No GraphQL rankings for this kill, falling back to web scraping")
+    
+    if fight_details is None and encounter_id and start_time and end_time:
+        fight_details, scraped_data = await asyncio.gather(
+            _bounded_wcl_fetch(get_fight_details_with_compare_type(session, token, report_code, fight_id, encounter_id, difficulty, metric)),
+            _bounded_wcl_fetch(scrape_wcl_web_data(session, report_code, fight_id, start_time, end_time, encounter_id, metric)),
+            return_exceptions=True
+        )
+        if isinstance(fight_details, BaseException) or not fight_details:
+            logger.debug("Failed to get basic fight details from GraphQL API")
+            return None
+        if isinstance(scraped_data, BaseException):
+            logger.error("Web scraping failed: %s", scraped_data)
+        elif scraped_data:
+            # Inject the scraped data into the fight_details structure
+            fight_details['scraped_parses'] = scraped_data
+        return fight_details
+    
     # Get basic fight data from GraphQL (table, playerDetails, etc.)
-    fight_details = await get_fight_details_with_compare_type(session, token, report_code, fight_id, encounter_id, difficulty, metric)
+    if fight_details is None:
+        fight_details = await get_fight_details_with_compare_type(session, token, report_code, fight_id, encounter_id, difficulty, metric)
     
     if not fight_details:
-        print(f"[DEBUG] Failed to get basic fight details from GraphQL API")
+        logger.debug("Failed to get basic fight details from GraphQL API")
         return None
     
-    # Always attempt web scraping for parse percentiles
+    # Fall back to web scraping for parse percentiles
     fights_data = fight_details.get('fights', [])
     fight_info = None
     for fight in fights_data:
@@ -195,182 +576,47 @@ async def get_fight_details(session, token, report_code, fight_id, encounter_id,
     
     return fight_details
 
-async def get_deaths_for_fight(session, token, report_code, fight_id):
-    """Get death events for a specific fight."""
-    print(f"[DEBUG] WCL: Fetching deaths for report: {report_code}, fight ID: {fight_id}")
-    
-    # First, try the standard Deaths query
-    query = """
-    query($reportCode: String!, $fightIDs: [Int]!) {
-        reportData {
-            report(code: $reportCode) {
-                events(fightIDs: $fightIDs, dataType: Deaths, startTime: 0, endTime: 99999999999) {
-                    data
-                }
-                fights(fightIDs: $fightIDs) {
-                    friendlyPlayers
-                    startTime
-                    endTime
-                }
-                masterData {
-                    actors(type: "Player") {
-                        id
-                        name
-                        type
-                    }
-                    abilities {
-                        gameID
-                        name
-                    }
-                }
-            }
-        }
-    }
+async def get_deaths_for_fight(session, token, report_code, fight_id, report_ctx=None):
+    """Get death events for a specific fight.
+
+    The deaths come from the report bundle, so the returned dict also carries the
+    fight's playerDetails and fights data (used for role colours) without a
+    second request. With a ReportContext the player and ability names come from
+    it instead of being re-sent with every fight.
     """
-    variables = {"reportCode": report_code, "fightIDs": [fight_id]}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
-    
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as response:
-        if response.status == 200:
-            data = await response.json()
-            if 'errors' in data:
-                print(f"[ERROR] Deaths query returned GraphQL errors: {data['errors']}")
-                # Try alternative query without dataType restriction
-                return await get_deaths_alternative_query(session, token, report_code, fight_id)
-            
-            report_data = data.get('data', {}).get('reportData', {}).get('report', {})
-            events_data = report_data.get('events', {})
-            events = events_data.get('data', []) if events_data else []
-            
-            # If no events found, try alternative query
-            if not events:
-                return await get_deaths_alternative_query(session, token, report_code, fight_id)
-            
-            # Build player ID to name mapping from masterData.actors
-            players = {}
-            master_data = report_data.get('masterData', {})
-            if master_data and 'actors' in master_data:
-                actors_list = master_data['actors']
-                for actor in actors_list:
-                    if actor.get('type') == 'Player':
-                        players[actor.get('id')] = actor.get('name', 'Unknown')
-            
-            # Build ability ID to name mapping from masterData.abilities
-            abilities = {}
-            if master_data and 'abilities' in master_data:
-                ability_list = master_data['abilities']
-                for ability in ability_list:
-                    abilities[ability.get('gameID')] = ability.get('name', 'Unknown')
-            
-            return {'events': events, 'players': players, 'abilities': abilities}
-        else:
-            response_text = await response.text()
-            print(f"[ERROR] Deaths query failed with status {response.status}: {response_text}")
-            return {'events': [], 'players': {}, 'abilities': {}}
-
-async def get_deaths_alternative_query(session, token, report_code, fight_id):
-    """Alternative deaths query using filter expression."""
-    print(f"[DEBUG] WCL: Trying alternative deaths query for report: {report_code}, fight ID: {fight_id}")
+    logger.debug("WCL: Fetching deaths for report: %s, fight ID: %s", report_code, fight_id)
     
-    # Try querying all events and filter for deaths
-    query = """
-    query($reportCode: String!, $fightIDs: [Int]!) {
-        reportData {
-            report(code: $reportCode) {
-                events(fightIDs: $fightIDs, startTime: 0, endTime: 99999999999, filterExpression: "type = 'death'") {
-                    data
-                }
-                fights(fightIDs: $fightIDs) {
-                    friendlyPlayers
-                    startTime
-                    endTime
-                }
-                masterData {
-                    actors(type: "Player") {
-                        id
-                        name
-                        type
-                    }
-                    abilities {
-                        gameID
-                        name
-                    }
-                }
-            }
-        }
-    }
-    """
-    variables = {"reportCode": report_code, "fightIDs": [fight_id]}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
+    if report_ctx is not None:
+        await report_ctx.ensure_master_data(session, token)
+    shared_names = report_ctx is not None and report_ctx.players is not None
+    # A GraphQL error on one death selection shouldn't lose the other
+    report_data = await get_report_bundle(
+        session, token, report_code, [fight_id], include_deaths=True, include_master_data=not shared_names,
+        allow_partial=True
+    )
+    if report_data is None:
+        # The whole document failed (e.g. the Deaths data type was rejected);
+        # retry with only the filter expression selection
+        logger.debug("WCL: Retrying deaths for fight %s with the filter expression only", fight_id)
+        report_data = await get_report_bundle(
+            session, token, report_code, [fight_id], include_deaths=True, include_master_data=not shared_names,
+            allow_partial=True, deaths_by_type=False
+        )
+    if report_data is None:
+        return {'events': [], 'players': {}, 'abilities': {}}
     
-    async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as response:
-        if response.status == 200:
-            data = await response.json()
-            if 'errors' in data:
-                print(f"[ERROR] Alternative deaths query returned GraphQL errors: {data['errors']}")
-                return {'events': [], 'players': {}, 'abilities': {}}
-            
-            report_data = data.get('data', {}).get('reportData', {}).get('report', {})
-            events_data = report_data.get('events', {})
-            events = events_data.get('data', []) if events_data else []
-            
-            # Build player and ability mappings
-            players = {}
-            master_data = report_data.get('masterData', {})
-            if master_data and 'actors' in master_data:
-                actors_list = master_data['actors']
-                for actor in actors_list:
-                    if actor.get('type') == 'Player':
-                        players[actor.get('id')] = actor.get('name', 'Unknown')
-            
-            abilities = {}
-            if master_data and 'abilities' in master_data:
-                ability_list = master_data['abilities']
-                for ability in ability_list:
-                    abilities[ability.get('gameID')] = ability.get('name', 'Unknown')
-            
-            return {'events': events, 'players': players, 'abilities': abilities}
-        else:
-            response_text = await response.text()
-            print(f"[ERROR] Alternative deaths query failed with status {response.status}: {response_text}")
-            return {'events': [], 'players': {}, 'abilities': {}}
-
-async def get_fight_basic_info(session, token, report_code, fight_id):
-    """Get basic fight information (startTime, endTime, encounterID, kill status)."""
-    query = """
-    query($reportCode: String!, $fightIDs: [Int]!) {
-        reportData {
-            report(code: $reportCode) {
-                fights(fightIDs: $fightIDs) {
-                    id
-                    startTime
-                    endTime
-                    encounterID
-                    kill
-                }
-            }
-        }
-    }
-    """
+    # Prefer the Deaths data type, falling back to the filter expression result
+    events = (report_data.get('deaths') or {}).get('data') or (report_data.get('filteredDeaths') or {}).get('data') or []
     
-    variables = {"reportCode": report_code, "fightIDs": [fight_id]}
-    headers = {'Authorization': f'Bearer {token}'}
-    url = "https://www.warcraftlogs.com/api/v2/client"
+    if shared_names:
+        players, abilities = report_ctx.players, report_ctx.abilities
+    else:
+        players, abilities = _build_master_maps(report_data.get('masterData'))
     
-    try:
-        async with session.post(url, json={'query': query, 'variables': variables}, headers=headers) as response:
-            if response.status != 200:
-                return None
-            
-            data = await response.json()
-            if 'errors' in data:
-                return None
-            
-            fights = data.get('data', {}).get('reportData', {}).get('report', {}).get('fights', [])
-            return fights[0] if fights else None
-            
-    except Exception as e:
-        print(f"[ERROR] Exception getting basic fight info: {e}")
-        return None
+    return {
+        'events': events,
+        'players': players,
+        'abilities': abilities,
+        'playerDetails': report_data.get('playerDetails'),
+        'fights': report_data.get('fights', [])
+    }
@@ -2,8 +2,178 @@
 # Web scraping functionality for WCL data
 
 import asyncio
+import logging
 import re
-from bs4 import BeautifulSoup
+import time
+from selectolax.lexbor import LexborHTMLParser
+from wcl_api import json_loads, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ijson lets the boss health lookup stream just the fights out of the
+# fights-and-participants payload instead of decoding the (much larger)
+# participant data too; fall back to a full decode if it isn't installed.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Table scrape selectors and patterns, built once at import
+_MAIN_TABLE_SELECTOR = 'table#main-table-0'
+_ROW_SELECTOR = 'tr[id^="main-table-row-"]'
+_ROW_ID = re.compile(r'main-table-row-\d+-\d+-\d+')
+_ODD_EVEN_ROW_SELECTOR = 'tr.odd[id], tr.even[id]'
+_NAME_LINK_SELECTOR = 'td.main-table-name a[href="#"]'
+_PARSE_LINK_SELECTOR = 'td.main-table-performance a'
+_ILVL_LINK_SELECTOR = 'td.main-table-ilvl-performance a'
+_NON_DIGIT = re.compile(r'\D+')
+
+# Browser-like headers for the scrape requests; the AJAX requests add a
+# per-report Referer on top.
+_INITIAL_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'no-cache',
+    'Pragma': 'no-cache',
+    'Priority': 'u=0, i',
+    'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"'
+}
+_AJAX_HEADERS_JSON = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'Cache-Control': 'no-cache',
+    'Pragma': 'no-cache',
+    'Priority': 'u=1, i',
+    'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-origin',
+    'X-Requested-With': 'XMLHttpRequest'
+}
+_AJAX_HEADERS_TABLE = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'Cache-Control': 'no-cache',
+    'Pragma': 'no-cache',
+    'Priority': 'u=1, i',
+    'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-origin',
+    'X-Requested-With': 'XMLHttpRequest'
+}
+
+# Scrape requests are paced by a token bucket rather than a fixed sleep, so
+# parallel scrapes can proceed up to the allowed rate but no faster.
+WCL_SCRAPE_RATE = 5
+WCL_SCRAPE_PERIOD_SECONDS = 1.0
+
+class _ScrapeRateLimiter:
+    """Async token bucket allowing `rate` requests per `period` seconds."""
+
+    def __init__(self, rate, period):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+_wcl_scrape_limiter = _ScrapeRateLimiter(WCL_SCRAPE_RATE, WCL_SCRAPE_PERIOD_SECONDS)
+
+# Scrapes share warcraftlogs.com's connection limit (limit_per_host=8 on the
+# shared session) with the GraphQL API; capping in-flight scrape requests below
+# it keeps a burst of scrapes from starving API calls of connections.
+WCL_SCRAPE_CONCURRENCY = 6
+_wcl_scrape_slots = asyncio.Semaphore(WCL_SCRAPE_CONCURRENCY)
+
+# Scraped results are shared between button presses (e.g. DPS then Deaths on
+# the same wipe). A finished fight's table is kept for an hour like the GraphQL
+# bundles; a report's boss health only briefly, since wipes are added while a
+# raid is logged live. Failed scrapes ({}) are not cached so they get retried.
+_scraped_table_cache = TTLCache(maxsize=256, ttl=3600)
+_boss_health_cache = TTLCache(maxsize=64, ttl=60)
+
+# The table and participants endpoints need the wcl_session and XSRF-TOKEN
+# cookies that the report page sets. They live in the shared session's cookie
+# jar, so the warm-up page load only happens when they're missing or stale.
+WCL_COOKIE_MAX_AGE_SECONDS = 30 * 60
+_wcl_cookies_fetched_at = 0.0
+_wcl_cookie_lock = asyncio.Lock()
+
+def _has_wcl_cookies(session):
+    """Check the session's cookie jar for both WCL session cookies."""
+    cookie_keys = {cookie.key for cookie in session.cookie_jar if cookie.value}
+    return 'wcl_session' in cookie_keys and 'XSRF-TOKEN' in cookie_keys
+
+async def _ensure_wcl_cookies(session, page_url):
+    """
+    Make sure the session holds fresh WCL session cookies, loading page_url to get them if needed.
+    Returns True if the cookies are available.
+    """
+    global _wcl_cookies_fetched_at
+    
+    async with _wcl_cookie_lock:
+        if _has_wcl_cookies(session) and time.monotonic() - _wcl_cookies_fetched_at < WCL_COOKIE_MAX_AGE_SECONDS:
+            return True
+        
+        logger.debug("Getting session cookies from: %s", page_url)
+        
+        async with _wcl_scrape_slots, _wcl_scrape_limiter, session.get(page_url, headers=_INITIAL_HEADERS, allow_redirects=True) as initial_response:
+            if initial_response.status != 200:
+                logger.error("Failed to get initial page, status: %s", initial_response.status)
+                return False
+        
+        if not _has_wcl_cookies(session):
+            logger.error("Failed to extract required cookies")
+            return False
+        
+        _wcl_cookies_fetched_at = time.monotonic()
+        return True
+
+def _is_wipe_with_boss_health(fight):
+    """Check whether a fights-and-participants entry is a wipe with boss percentage data."""
+    return (
+        isinstance(fight, dict)
+        and not fight.get('kill')
+        and fight.get('id') is not None
+        and fight.get('bossPercentage') is not None
+    )
 
 async def get_all_boss_health_for_report(session, report_code):
     """
@@ -11,113 +181,57 @@ async def get_all_boss_health_for_report(session, report_code):
     This is much more efficient than making individual requests per fight.
     Returns a dictionary mapping fight_id -> boss_health_percentage
     """
-    print(f"[DEBUG] WCL: Fetching boss health for all fights in report: {report_code}")
+    cached = _boss_health_cache.get(report_code)
+    if cached is not None:
+        return cached
+    logger.debug("WCL: Fetching boss health for all fights in report: %s", report_code)
     
-    # Step 1: Visit the main page to get session cookies and XSRF token
     main_page_url = f"https://www.warcraftlogs.com/reports/{report_code}"
     
-    print(f"[DEBUG] Getting session cookies from: {main_page_url}")
-    
-    # First request to get session and XSRF token
-    initial_headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'no-cache',
-        'Pragma': 'no-cache',
-        'Priority': 'u=0, i',
-        'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-        'Sec-Ch-Ua-Mobile': '?0',
-        'Sec-Ch-Ua-Platform': '"Windows"'
-    }
-    
     try:
-        # Step 1: Get session cookies and XSRF token
-        async with session.get(main_page_url, headers=initial_headers, allow_redirects=True) as initial_response:
-            if initial_response.status != 200:
-                print(f"[ERROR] Failed to get initial page for participants endpoint, status: {initial_response.status}")
-                return {}
-            
-            print(f"[DEBUG] Successfully loaded main page for participants endpoint")
-            
-            # Extract cookies from the session
-            cookies = {}
-            for cookie in session.cookie_jar:
-                if cookie.key in ['wcl_session', 'XSRF-TOKEN']:
-                    cookies[cookie.key] = cookie.value
-            
-            if not cookies.get('wcl_session') or not cookies.get('XSRF-TOKEN'):
-                print(f"[ERROR] Failed to extract required cookies for participants endpoint")
+        # Step 1: Make sure the session has the WCL session cookies and XSRF token
+        if not await _ensure_wcl_cookies(session, main_page_url):
+            return {}
+        
+        # Step 2: Make the AJAX request to the fights-and-participants endpoint
+        participants_url = f"https://www.warcraftlogs.com/reports/fights-and-participants/{report_code}/0"
+        
+        async with _wcl_scrape_slots, _wcl_scrape_limiter, session.get(participants_url, headers={**_AJAX_HEADERS_JSON, 'Referer': main_page_url}, allow_redirects=True) as response:
+            if response.status != 200:
+                logger.error("Participants endpoint failed with status %s", response.status)
                 return {}
             
-            # Step 2: Make the AJAX request to the fights-and-participants endpoint
-            participants_url = f"https://www.warcraftlogs.com/reports/fights-and-participants/{report_code}/0"
-            
-            # Headers for the AJAX request
-            ajax_headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-                'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br, zstd',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache',
-                'Priority': 'u=1, i',
-                'Referer': main_page_url,
-                'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-                'Sec-Ch-Ua-Mobile': '?0',
-                'Sec-Ch-Ua-Platform': '"Windows"',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-origin',
-                'X-Requested-With': 'XMLHttpRequest'
-            }
-            
-            await asyncio.sleep(1)  # Small delay to mimic human behavior
-            
-            async with session.get(participants_url, headers=ajax_headers, allow_redirects=True) as response:
-                if response.status != 200:
-                    print(f"[ERROR] Participants endpoint failed with status {response.status}")
-                    return {}
-                
-                data = await response.json()
+            # Extract boss health data for all fights that are wipes. bossPercentage
+            # is in hundredths (e.g. 8544 -> 85.44%).
+            if ijson is not None:
+                fights = ijson.items_async(response.content, 'fights.item', use_float=True)
+                boss_health_data = {
+                    fight['id']: fight['bossPercentage'] / 100
+                    async for fight in fights if _is_wipe_with_boss_health(fight)
+                }
+            else:
+                data = json_loads(await response.read())
                 
                 if not isinstance(data, dict) or 'fights' not in data:
-                    print(f"[ERROR] Invalid response format from participants endpoint")
+                    logger.error("Invalid response format from participants endpoint")
                     return {}
                 
                 fights = data['fights']
                 if not isinstance(fights, list):
-                    print(f"[ERROR] Fights data is not a list")
+                    logger.error("Fights data is not a list")
                     return {}
                 
-                # Extract boss health data for all fights that are wipes
-                boss_health_data = {}
-                for fight in fights:
-                    if isinstance(fight, dict):
-                        fight_id = fight.get('id')
-                        is_kill = fight.get('kill', False)
-                        boss_percentage_raw = fight.get('bossPercentage')
-                        
-                        # Only include wipes that have boss percentage data
-                        if not is_kill and fight_id is not None and boss_percentage_raw is not None:
-                            # Convert from hundredths to actual percentage (e.g., 8544 -> 85.44)
-                            boss_health_percentage = boss_percentage_raw / 100
-                            boss_health_data[fight_id] = boss_health_percentage
-                            print(f"[DEBUG] Fight {fight_id}: {boss_health_percentage:.2f}% boss health")
-                
-                print(f"[DEBUG] Successfully extracted boss health data for {len(boss_health_data)} wipes")
-                return boss_health_data
-                
+                boss_health_data = {
+                    fight['id']: fight['bossPercentage'] / 100
+                    for fight in fights if _is_wipe_with_boss_health(fight)
+                }
+            
+            logger.debug("Successfully extracted boss health data for %s wipes", len(boss_health_data))
+            _boss_health_cache.set(report_code, boss_health_data)
+            return boss_health_data
+            
     except Exception as e:
-        print(f"[ERROR] Exception calling participants endpoint: {e}")
+        logger.error("Exception calling participants endpoint: %s", e)
         return {}
 
 async def get_boss_health_for_wipe(session, token, report_code, fight_id, start_time=None, end_time=None, encounter_id=None, boss_health_cache=None):
@@ -126,16 +240,16 @@ async def get_boss_health_for_wipe(session, token, report_code, fight_id, start_
     If boss_health_cache is provided, use it instead of making a new request.
     This is more efficient when getting health for multiple fights from the same report.
     """
-    print(f"[DEBUG] WCL: Fetching boss health for wipe - report: {report_code}, fight ID: {fight_id}")
+    logger.debug("WCL: Fetching boss health for wipe - report: %s, fight ID: %s", report_code, fight_id)
     
     # If we have a cache, use it
     if boss_health_cache is not None:
         boss_health_percentage = boss_health_cache.get(fight_id)
         if boss_health_percentage is not None:
-            print(f"[DEBUG] Got boss health from cache: {boss_health_percentage:.2f}%")
+            logger.debug("Got boss health from cache: %.2f%%", boss_health_percentage)
             return boss_health_percentage
         else:
-            print("[DEBUG] No boss health found in cache for this fight")
+            logger.debug("No boss health found in cache for this fight")
             return None
     
     # Fallback: get health data for all fights in the report (less efficient but still works)
@@ -143,10 +257,10 @@ async def get_boss_health_for_wipe(session, token, report_code, fight_id, start_
     boss_health_percentage = all_boss_health.get(fight_id)
     
     if boss_health_percentage is not None:
-        print(f"[DEBUG] Successfully got boss health from participants endpoint: {boss_health_percentage:.2f}%")
+        logger.debug("Successfully got boss health from participants endpoint: %.2f%%", boss_health_percentage)
         return boss_health_percentage
     else:
-        print("[DEBUG] No boss health found in participants endpoint data")
+        logger.debug("No boss health found in participants endpoint data")
         return None
 
 async def scrape_wcl_web_data(session, report_code, fight_id, start_time, end_time, encounter_id, metric):
@@ -154,144 +268,86 @@ async def scrape_wcl_web_data(session, report_code, fight_id, start_time, end_ti
     Fallback function to scrape parse/ilvl percentages from WCL website when GraphQL API doesn't provide ranking data.
     Uses a two-step process: first get session tokens, then make the AJAX request.
     """
-    print(f"[DEBUG] Scraping WCL web data for fight {fight_id}")
-    
-    # Step 1: Visit the main page to get session cookies and XSRF token
     metric_type = "damage-done" if metric == "dps" else "healing"
-    main_page_url = f"https://www.warcraftlogs.com/reports/{report_code}?fight={fight_id}&type={metric_type}"
-    
-    print(f"[DEBUG] Scraping URL: {main_page_url}")
+    cache_key = (report_code, fight_id, metric_type, start_time, end_time)
+    cached = _scraped_table_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    logger.debug("Scraping WCL web data for fight %s", fight_id)
     
-    # First request to get session and XSRF token
-    initial_headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'no-cache',
-        'Pragma': 'no-cache',
-        'Priority': 'u=0, i',
-        'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-        'Sec-Ch-Ua-Mobile': '?0',
-        'Sec-Ch-Ua-Platform': '"Windows"'
-    }
+    main_page_url = f"https://www.warcraftlogs.com/reports/{report_code}?fight={fight_id}&type={metric_type}"
     
     try:
-        # Step 1: Get session cookies and XSRF token
-        async with session.get(main_page_url, headers=initial_headers, allow_redirects=True) as initial_response:
-            if initial_response.status != 200:
-                print(f"[ERROR] Failed to get initial page, status: {initial_response.status}")
-                return {}
-            
-            print(f"[DEBUG] Successfully loaded main page: {main_page_url}")
-            
-            # Extract cookies from the session
-            cookies = {}
-            for cookie in session.cookie_jar:
-                if cookie.key in ['wcl_session', 'XSRF-TOKEN']:
-                    cookies[cookie.key] = cookie.value
-            
-            if not cookies.get('wcl_session') or not cookies.get('XSRF-TOKEN'):
-                print(f"[ERROR] Failed to extract required cookies")
+        # Step 1: Make sure the session has the WCL session cookies and XSRF token
+        if not await _ensure_wcl_cookies(session, main_page_url):
+            return {}
+        
+        # Step 2: Make the AJAX request to the table endpoint with the tokens
+        table_url = f"https://www.warcraftlogs.com/reports/table/{metric_type}/{report_code}/{fight_id}/{start_time}/{end_time}/source/0/0/0/0/0/0/-1.0.-1.-1/-1/Any/Any/0/3014"
+        
+        async with _wcl_scrape_slots, _wcl_scrape_limiter, session.get(table_url, headers={**_AJAX_HEADERS_TABLE, 'Referer': main_page_url}, allow_redirects=True) as table_response:
+            if table_response.status != 200:
+                logger.error("Table endpoint failed with status %s", table_response.status)
                 return {}
             
-            # Step 2: Make the AJAX request to the table endpoint with the tokens
-            table_url = f"https://www.warcraftlogs.com/reports/table/{metric_type}/{report_code}/{fight_id}/{start_time}/{end_time}/source/0/0/0/0/0/0/-1.0.-1.-1/-1/Any/Any/0/3014"
-            
-            # Headers for the AJAX request (mimicking the browser request you showed)
-            ajax_headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br, zstd',
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache',
-                'Priority': 'u=1, i',
-                'Referer': main_page_url,
-                'Sec-Ch-Ua': '"Not)A;Brand";v="8", "Chromium";v="138", "Google Chrome";v="138"',
-                'Sec-Ch-Ua-Mobile': '?0',
-                'Sec-Ch-Ua-Platform': '"Windows"',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-origin',
-                'X-Requested-With': 'XMLHttpRequest'
-            }
-            
-            await asyncio.sleep(1)  # Small delay to mimic human behavior
-            
-            async with session.get(table_url, headers=ajax_headers, allow_redirects=True) as table_response:
-                if table_response.status != 200:
-                    print(f"[ERROR] Table endpoint failed with status {table_response.status}")
-                    return {}
-                
-                html_content = await table_response.text()
-                
-                # Check if we got an error or anti-scraping message
-                if "Use the API at /v1/docs instead of scraping HTML" in html_content:
-                    print(f"[DEBUG] Got anti-scraping message from table endpoint")
-                    return {}
-                
-                if len(html_content) < 500:
-                    print(f"[DEBUG] Table endpoint response too short, likely not valid data")
-                    return {}
-                
-                # Parse the response for table data only (no boss health)
-                table_data = await parse_table_response(html_content)
-                return table_data
-    
+            # Raw bytes go straight to the (UTF-8) HTML parser, skipping the
+            # charset detection and str decode of .text(). The body is buffered
+            # rather than parsed as it arrives: selectolax has no incremental
+            # API, and one lexbor pass over this table fragment beats feeding
+            # chunks to a pure-Python parser.
+            html_content = await table_response.read()
+        
+        # The connection and scrape slot are released before parsing
+        # Check if we got an error or anti-scraping message
+        if b"Use the API at /v1/docs instead of scraping HTML" in html_content:
+            logger.debug("Got anti-scraping message from table endpoint")
+            return {}
+        
+        if len(html_content) < 500:
+            logger.debug("Table endpoint response too short, likely not valid data")
+            return {}
+        
+        # Parse the response for table data only (no boss health)
+        table_data = await parse_table_response(html_content)
+        if table_data:
+            _scraped_table_cache.set(cache_key, table_data)
+        return table_data
+
     except Exception as e:
-        print(f"[ERROR] Web scraping failed: {e}")
+        logger.error("Web scraping failed: %s", e)
         return {}
 
 def _extract_player_name(row):
     """Extract player name from a table row."""
-    name_cell = row.find('td', class_='main-table-name')
-    if not name_cell:
-        return None
-    
-    name_link = name_cell.find('a', href='#')
+    name_link = row.css_first(_NAME_LINK_SELECTOR)
     if not name_link:
         return None
     
-    player_name = name_link.get_text(strip=True)
+    player_name = name_link.text(strip=True)
     return player_name if player_name else None
 
-def _extract_percentage(row, cell_class):
+def _extract_percentage(row, link_selector):
     """Extract percentage value from a table cell."""
-    cell = row.find('td', class_=cell_class)
-    if not cell:
-        return None
-    
-    link = cell.find('a')
+    link = row.css_first(link_selector)
     if not link:
         return None
     
-    text = link.get_text(strip=True)
-    text_clean = ''.join(c for c in text if c.isdigit())
-    return int(text_clean) if text_clean.isdigit() else None
+    digits = _NON_DIGIT.sub('', link.text(strip=True))
+    return int(digits) if digits else None
 
 async def parse_table_response(html_content):
     """
-    Parse the HTML response from the table endpoint to extract player data.
+    Parse the HTML response (str or UTF-8 bytes) from the table endpoint to extract player data.
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        tree = LexborHTMLParser(html_content)
         
         # Look for the main table with data
-        main_table = soup.find('table', {'id': 'main-table-0'})
+        main_table = tree.css_first(_MAIN_TABLE_SELECTOR)
         if not main_table:
             # Try to find any table with data
-            all_tables = soup.find_all('table')
-            for table in all_tables:
-                rows = table.find_all('tr')
-                if len(rows) > 5:  # Table with meaningful data
+            for table in tree.css('table'):
+                if len(table.css('tr')) > 5:  # Table with meaningful data
                     main_table = table
                     break
         
@@ -299,12 +355,15 @@ async def parse_table_response(html_content):
             return {}
         
         # Look for table rows with data
-        table_rows = main_table.find_all('tr', {'id': re.compile(r'main-table-row-\d+-\d+-\d+')})
+        # The prefix selector also catches rows like main-table-row-totals; keep
+        # only the numbered player rows
+        table_rows = [row for row in main_table.css(_ROW_SELECTOR)
+                      if _ROW_ID.search(row.attributes.get('id') or '')]
         
         if len(table_rows) == 0:
             # Try alternative row selection - look for rows with specific classes
-            table_rows = main_table.find_all('tr', class_=re.compile(r'(odd|even)'))
-            table_rows = [row for row in table_rows if row.get('id') and 'totals' not in row.get('id', '')]
+            table_rows = main_table.css(_ODD_EVEN_ROW_SELECTOR)
+            table_rows = [row for row in table_rows if 'totals' not in row.attributes.get('id', '')]
         
         if len(table_rows) == 0:
             return {}
@@ -318,8 +377,8 @@ async def parse_table_response(html_content):
                 if not player_name:
                     continue
                 
-                parse_percent = _extract_percentage(row, 'main-table-performance')
-                ilvl_percent = _extract_percentage(row, 'main-table-ilvl-performance')
+                parse_percent = _extract_percentage(row, _PARSE_LINK_SELECTOR)
+                ilvl_percent = _extract_percentage(row, _ILVL_LINK_SELECTOR)
                 
                 # Store the data if we found percentages
                 if parse_percent is not None or ilvl_percent is not None:
@@ -332,10 +391,10 @@ async def parse_table_response(html_content):
                 continue
         
         if scraped_data:
-            print(f"[DEBUG] Web scraping successful! Got data for {len(scraped_data)} players")
+            logger.debug("Web scraping successful! Got data for %s players", len(scraped_data))
         
         return scraped_data
     
     except Exception as e:
-        print(f"[ERROR] Failed to parse table response: {e}")
+        logger.error("Failed to parse table response: %s", e)
         return {}